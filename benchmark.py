@@ -0,0 +1,344 @@
+"""Reproducible stress benchmarks for the game loop.
+
+Each scenario drives the real game classes headlessly from a fixed seed and
+records per-phase frame times. Results are written to a JSON file so runs
+can be compared across commits::
+
+    python benchmark.py --output results.json
+    python benchmark.py --scenario bomb --frames 2000
+
+``--check`` instead verifies that the broad-phase collision grid finds the
+same hits as pygame's brute-force tests, and exits non-zero if it does not.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SPACESHOOTER_HEADLESS', '1')
+
+import pygame
+
+import spaceshooter
+from spaceshooter import (ENEMY_SHOT, HEIGHT, PLAYER_SHOT, WIDTH, Enemy, FrameProfiler, Game,
+                          PowerUp, ShooterEnemy, StarryBackground, percentiles)
+
+SCENARIOS = {}
+
+def scenario(name):
+    """Register a scenario setup function under a name.
+
+    The setup function receives the game and the parsed arguments, prepares
+    the game state and returns a callable mapping a frame number to the
+    (held, pressed) keys for that frame. It may also keep the scene topped
+    up from that callable.
+    """
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+def spawn_enemy(game, enemy_class=Enemy, speed=None):
+    """Add an enemy at a random on-screen position.
+
+    Args:
+        game (Game): The game instance.
+        enemy_class (type): Enemy or ShooterEnemy.
+        speed (float): Vertical speed override, or None to keep the rolled speed.
+
+    Returns:
+        Enemy: The spawned enemy.
+    """
+    if enemy_class is ShooterEnemy:
+        enemy = ShooterEnemy(game, game.level, game.player)
+    else:
+        enemy = Enemy(game.level, game.rng)
+    enemy.pos.update(game.rng.randrange(WIDTH), game.rng.randrange(HEIGHT // 2))
+    enemy.rect.center = enemy.pos
+    if speed is not None:
+        enemy.velocity.y = speed
+    game.all_sprites.add(enemy)
+    game.enemies.add(enemy)
+    return enemy
+
+@scenario('enemies')
+def enemies_scenario(game, args):
+    """Keep a fixed number of slow enemies on screen while the player fires."""
+    def inputs(frame):
+        while len(game.enemies) < args.enemies:
+            spawn_enemy(game, speed=20)
+        return (pygame.K_LEFT,), (pygame.K_SPACE,) if frame % 10 == 0 else ()
+    return inputs
+
+@scenario('weapon3_burst')
+def weapon3_burst_scenario(game, args):
+    """Fire a five-way spread every frame while sweeping the ship around."""
+    game.player.weapon_level = 3
+    def inputs(frame):
+        game.player.powerup_timer = 10
+        while len(game.enemies) < args.enemies // 4:
+            spawn_enemy(game)
+        return (pygame.K_LEFT,), (pygame.K_SPACE,)
+    return inputs
+
+@scenario('bomb')
+def bomb_scenario(game, args):
+    """Refill 100 enemies and drop a bomb on the player every 60 frames."""
+    def inputs(frame):
+        if frame % 60 == 0:
+            while len(game.enemies) < 100:
+                spawn_enemy(game, speed=0)
+            bomb = PowerUp('bomb', game.player.rect.center)
+            game.all_sprites.add(bomb)
+            game.powerups.add(bomb)
+        return (), ()
+    return inputs
+
+@scenario('shooter_volleys')
+def shooter_volleys_scenario(game, args):
+    """Keep a wall of shooter enemies firing at the player."""
+    game.level = 3
+    def inputs(frame):
+        while len(game.enemies) < args.enemies // 2:
+            shooter = spawn_enemy(game, ShooterEnemy, speed=0)
+            shooter.shoot_timer = game.rng.randint(1, 60) / 60
+        return (pygame.K_UP, pygame.K_LEFT), ()
+    return inputs
+
+@scenario('bullet_storm')
+def bullet_storm_scenario(game, args):
+    """Fill the screen with enemy fire from rotating emitters around the edge."""
+    def inputs(frame):
+        for i in range(args.bullets // 120):
+            angle = (frame * 7 + i * 360 / (args.bullets // 120)) % 360
+            rad = math.radians(angle)
+            direction = pygame.math.Vector2(-math.sin(rad), -math.cos(rad))
+            game.projectiles.spawn(game.player.pos - direction * 400, direction * 200,
+                                   angle, ENEMY_SHOT)
+        return (), ()
+    return inputs
+
+@scenario('starfield')
+def starfield_scenario(game, args):
+    """Scroll a dense star field with nothing else going on."""
+    game.starry_background = StarryBackground(args.stars, game.rng)
+    def inputs(frame):
+        for enemy in game.enemies:
+            enemy.kill()
+        return (), ()
+    return inputs
+
+def run_scenario(name, args):
+    """Run one scenario and collect its measurements.
+
+    Args:
+        name (str): Registered scenario name.
+        args (argparse.Namespace): Benchmark options.
+
+    Returns:
+        dict: Per-phase percentiles, allocation figures and throughput.
+    """
+    game = Game(rng=random.Random(args.seed), headless=True, render_mode=args.render_mode)
+    game.sounds.wait()  # Sounds load in the background; time every frame with them
+    game.reset()
+    game.player.lives = 10 ** 9  # The player must survive the whole scenario
+    inputs = SCENARIOS[name](game, args)
+
+    for frame in range(args.warmup):
+        game.step(*inputs(frame))
+        if not args.no_draw:
+            game.draw()
+
+    collections = [0]
+    def count_collections(phase, info):
+        if phase == 'start':
+            collections[0] += 1
+    gc.callbacks.append(count_collections)
+
+    # The game's own profiler splits update and draw into finer phases
+    profiler = game.profiler = FrameProfiler(args.frames)
+    profiler.enabled = True
+    phases = {'update': [], 'draw': []}
+    filled = {'rects': 0, 'pixels': 0}
+    misses = spaceshooter.assets.misses
+    blocks = sys.getallocatedblocks()
+    started = time.perf_counter()
+    for frame in range(args.warmup, args.warmup + args.frames):
+        held, pressed = inputs(frame)
+        profiler.begin_frame()
+        t0 = time.perf_counter()
+        game.step(held, pressed)
+        t1 = time.perf_counter()
+        phases['update'].append((t1 - t0) * 1000)
+        if not args.no_draw:
+            game.draw()
+            phases['draw'].append((time.perf_counter() - t1) * 1000)
+            for key in filled:
+                filled[key] += game.render_stats[key]
+        profiler.end_frame(game.sprite_counts())
+    elapsed = time.perf_counter() - started
+    gc.callbacks.remove(count_collections)
+
+    pools = {'explosions': game.explosion_pool.stats()}
+    particles = game.particles.stats()
+
+    # Round trips through a saved state, as rollback would take them
+    entities = len(game.all_sprites) + len(game.projectiles)
+    state_times = {'snapshot': [], 'restore': []}
+    for _ in range(50):
+        t0 = time.perf_counter()
+        state = game.snapshot()
+        t1 = time.perf_counter()
+        game.restore(state)
+        state_times['snapshot'].append((t1 - t0) * 1000)
+        state_times['restore'].append((time.perf_counter() - t1) * 1000)
+    detail = {}
+    for frame in profiler.frames:
+        for phase, value in frame['phases'].items():
+            detail.setdefault(phase, []).append(value)
+    return {
+        'frames': args.frames,
+        'phases': {phase: percentiles(samples) for phase, samples in phases.items() if samples},
+        'profile': {phase: percentiles(samples) for phase, samples in detail.items()},
+        'frames_per_second': args.frames / elapsed,
+        'allocations': {
+            'net_blocks_per_frame': (sys.getallocatedblocks() - blocks) / args.frames,
+            'gc_collections': collections[0],
+            'asset_loads': spaceshooter.assets.misses - misses,
+            'pools': pools,
+        },
+        'render': {
+            'mode': args.render_mode,
+            'rects_per_frame': filled['rects'] / args.frames,
+            'pixels_per_frame': filled['pixels'] / args.frames,
+        },
+        'projectiles': game.projectiles.stats(),
+        'particles': particles,
+        'state': {'entities': entities,
+                  **{name: percentiles(samples) for name, samples in state_times.items()}},
+        'audio': game.sounds.stats(),
+        'collisions': game.narrow_phase.stats(),
+        'final_sprites': len(game.all_sprites),
+        'score': game.score,
+    }
+
+def check_collisions(seed, trials=200):
+    """Compare the game's grid collision queries with pygame's brute-force ones.
+
+    Each trial scatters enemies around the player, files them in the grid,
+    then kills some of them without syncing, as shots do during a tick. The
+    grid must report exactly the live enemies ``pygame.sprite.spritecollide``
+    reports. A final scene checks that an enemy shot down in a tick can no
+    longer hit the player in the same tick.
+
+    Args:
+        seed (int): Seed for the game RNG.
+        trials (int): Number of random scenes.
+
+    Returns:
+        list: Descriptions of the mismatches found; empty if none.
+    """
+    game = Game(rng=random.Random(seed), headless=True)
+    game.reset()
+    rng = random.Random(seed)
+    player = game.player
+    mismatches = []
+    for trial in range(trials):
+        for enemy in game.enemies:
+            enemy.kill()
+        player.pos.update(rng.uniform(100, WIDTH - 100), rng.uniform(100, HEIGHT - 100))
+        player.rect.center = player.pos
+        for _ in range(30):
+            enemy = spawn_enemy(game, rng.choice([Enemy, ShooterEnemy]))
+            enemy.pos.update(player.pos.x + rng.uniform(-80, 80), player.pos.y + rng.uniform(-80, 80))
+            enemy.rect.center = enemy.pos
+        game.enemy_grid.sync(game.enemies)
+        for enemy in rng.sample(game.enemies.sprites(), 10):
+            enemy.kill()
+        expected = set(pygame.sprite.spritecollide(player, game.enemies, False,
+                                                   pygame.sprite.collide_mask))
+        found = set(game.enemy_grid.spritecollide(player, False, game.narrow_phase))
+        if found != expected:
+            mismatches.append(f"trial {trial}: grid found {len(found)} enemies, "
+                              f"brute force {len(expected)}")
+
+    # A shot inside an enemy that overlaps the player: the enemy dies and
+    # the player keeps every life
+    game.reset()
+    game.next_powerup_time = float('inf')
+    enemy = spawn_enemy(game, speed=0)
+    enemy.pos.update(game.player.pos)
+    enemy.rect.center = enemy.pos
+    game.projectiles.spawn(enemy.pos, (0, 0), 0, PLAYER_SHOT)
+    lives = game.player.lives
+    game.update(game.tick_time)
+    if enemy.alive() or game.player.lives != lives:
+        mismatches.append(f"shot-down enemy: alive {enemy.alive()}, "
+                          f"lives {game.player.lives} of {lives}")
+    return mismatches
+
+def git_revision():
+    """Return the current git commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Py Space Shooter game loop.")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="Scenario to run; repeat for several (default: all)")
+    parser.add_argument('--frames', type=int, default=1000, help="Measured frames per scenario")
+    parser.add_argument('--warmup', type=int, default=60, help="Unmeasured frames before timing")
+    parser.add_argument('--seed', type=int, default=1234, help="Seed for the game RNG")
+    parser.add_argument('--enemies', type=int, default=100, help="Enemies kept on screen")
+    parser.add_argument('--bullets', type=int, default=10000,
+                        help="Live bullets targeted by the bullet_storm scenario")
+    parser.add_argument('--stars', type=int, default=2000, help="Stars per layer in the starfield scenario")
+    parser.add_argument('--render-mode', choices=['dirty', 'full'], default='dirty',
+                        help="Renderer to benchmark")
+    parser.add_argument('--no-draw', action='store_true', help="Skip Game.draw and time the simulation only")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write")
+    parser.add_argument('--check', action='store_true',
+                        help="Check collision results against brute force instead of timing")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        mismatches = check_collisions(args.seed)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"Collision check: {len(mismatches)} mismatches")
+        sys.exit(1 if mismatches else 0)
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'options': {key: value for key, value in vars(args).items() if key != 'output'},
+        'scenarios': {},
+    }
+    for name in args.scenario or sorted(SCENARIOS):
+        result = run_scenario(name, args)
+        results['scenarios'][name] = result
+        update = result['phases']['update']
+        line = (f"{name:16} {result['frames_per_second']:9.1f} fps  "
+                f"update p50 {update['p50']:.3f} p95 {update['p95']:.3f} p99 {update['p99']:.3f} ms")
+        if 'draw' in result['phases']:
+            draw = result['phases']['draw']
+            line += f"  draw p50 {draw['p50']:.3f} p95 {draw['p95']:.3f} p99 {draw['p99']:.3f} ms"
+            line += f"  {result['render']['pixels_per_frame']:.0f} px/frame"
+        print(line)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
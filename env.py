@@ -0,0 +1,369 @@
+"""Reset/step environment API for bots and automated play.
+
+``GameEnv`` drives one headless game with integer actions and returns NumPy
+observations. ``VectorEnv`` runs many of them in worker processes and steps
+them in lockstep with batched actions::
+
+    from env import VectorEnv, ACTION_FIRE, ACTION_LEFT
+
+    with VectorEnv(64, seed=1) as envs:
+        observations = envs.reset()
+        for _ in range(1000):
+            actions = np.full(64, ACTION_LEFT | ACTION_FIRE)
+            observations, rewards, dones, infos = envs.step(actions)
+"""
+import multiprocessing
+import os
+import random
+
+import numpy as np
+import pygame
+
+import spaceshooter
+from spaceshooter import (ENEMY_SHOT, POWERUP_TYPES, Game, ShooterEnemy, frame_view,
+                          reduce_frames)
+
+# Actions are bit masks of these flags, so there are NUM_ACTIONS of them
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_UP = 4
+ACTION_DOWN = 8
+ACTION_FIRE = 16
+NUM_ACTIONS = 32
+ACTION_KEYS = [(ACTION_LEFT, pygame.K_LEFT), (ACTION_RIGHT, pygame.K_RIGHT),
+               (ACTION_UP, pygame.K_UP), (ACTION_DOWN, pygame.K_DOWN)]
+
+# Entities reported per observation, nearest to the player first; the rest
+# are left out and the padding is zeros
+MAX_OBSERVED_ENEMIES = 32
+MAX_OBSERVED_PROJECTILES = 64
+MAX_OBSERVED_POWERUPS = 4
+
+# Episodes are cut off after this many ticks (five minutes of play)
+MAX_EPISODE_TICKS = 5 * 60 * 60
+
+def observation_space():
+    """Return the shape and dtype of every observation array of a single game.
+
+    Returns:
+        dict: (shape, dtype) per observation key.
+    """
+    return {
+        'player': ((7,), np.float32),  # x, y, vx, vy, angle, shield, weapon level
+        'enemies': ((MAX_OBSERVED_ENEMIES, 5), np.float32),  # x, y, vx, vy, shooter
+        'projectiles': ((MAX_OBSERVED_PROJECTILES, 5), np.float32),  # x, y, vx, vy, enemy shot
+        'powerups': ((MAX_OBSERVED_POWERUPS, 3), np.float32),  # x, y, type index
+        'counts': ((3,), np.int32),  # Enemies, projectiles and power-ups on screen
+        'lives': ((), np.int32),
+        'score': ((), np.int32),
+        'level': ((), np.int32),
+    }
+
+def nearest(points, origin, limit):
+    """Return the rows of an array closest to a point, nearest first.
+
+    Args:
+        points (np.ndarray): Rows starting with x, y.
+        origin (tuple): The (x, y) point.
+        limit (int): Maximum number of rows returned.
+
+    Returns:
+        np.ndarray: At most ``limit`` rows.
+    """
+    if len(points) <= 1:
+        return points
+    distance = (points[:, 0] - origin[0]) ** 2 + (points[:, 1] - origin[1]) ** 2
+    if len(points) > limit:
+        order = np.argpartition(distance, limit - 1)[:limit]
+        order = order[np.argsort(distance[order])]
+    else:
+        order = np.argsort(distance)
+    return points[order]
+
+class GameEnv:
+    """One headless game stepped with integer actions."""
+
+    def __init__(self, seed=None, difficulty='Normal', max_ticks=MAX_EPISODE_TICKS,
+                 action_repeat=1):
+        """Initialize the environment.
+
+        Args:
+            seed (int): Seed of the first episode, or None for a random one.
+            difficulty (str): One of spaceshooter.DIFFICULTIES.
+            max_ticks (int): Ticks after which an episode is cut off.
+            action_repeat (int): Simulation ticks per step. Fire is only
+                pressed on the first of them.
+        """
+        self.game = Game(rng=random.Random(seed), headless=True)
+        self.game.difficulty = difficulty
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.action_repeat = action_repeat
+        self.ticks = 0
+        self.observations = {key: np.zeros(shape, dtype)
+                             for key, (shape, dtype) in observation_space().items()}
+
+    def reset(self, seed=None):
+        """Start a new episode.
+
+        Args:
+            seed (int): Seed of the episode; by default one is drawn from the
+                environment's RNG.
+
+        Returns:
+            dict: The first observation.
+        """
+        self.game.reset(seed)
+        self.seed = self.game.seed
+        self.ticks = 0
+        return self.observe()
+
+    def step(self, action):
+        """Advance the game by ``action_repeat`` ticks.
+
+        Args:
+            action (int): Bit mask of ACTION_* flags.
+
+        Returns:
+            tuple: (observation, reward, done, info). The reward is the score
+            gained; ``info`` holds 'episode' with the final score, ticks and
+            seed once the episode is over.
+        """
+        game = self.game
+        held = [key for flag, key in ACTION_KEYS if action & flag]
+        pressed = (pygame.K_SPACE,) if action & ACTION_FIRE else ()
+        score = game.score
+        for _ in range(self.action_repeat):
+            game.step(held, pressed)
+            pressed = ()
+            self.ticks += 1
+            if not game.playing or self.ticks >= self.max_ticks:
+                break
+        done = not game.playing or self.ticks >= self.max_ticks
+        info = {}
+        if done:
+            info['episode'] = {'score': game.score, 'ticks': self.ticks, 'seed': self.seed}
+        return self.observe(), game.score - score, done, info
+
+    def observe(self):
+        """Return the current observation.
+
+        Returns:
+            dict: Arrays shaped as described by ``observation_space``. They
+            are overwritten by the next call, so copy them to keep them.
+        """
+        game = self.game
+        player = game.player
+        observations = self.observations
+        rad = np.radians(player.angle)
+        observations['player'][:] = (
+            player.pos.x, player.pos.y,
+            -player.speed * np.sin(rad), -player.speed * np.cos(rad),
+            player.angle % 360, player.shield, player.weapon_level)
+        origin = (player.pos.x, player.pos.y)
+
+        enemies = np.array([(enemy.pos.x, enemy.pos.y, enemy.velocity.x, enemy.velocity.y,
+                             isinstance(enemy, ShooterEnemy)) for enemy in game.enemies],
+                           dtype=np.float32).reshape(-1, 5)
+        projectiles = game.projectiles
+        count = projectiles.count
+        shots = np.stack([projectiles.x[:count], projectiles.y[:count],
+                          projectiles.vx[:count], projectiles.vy[:count],
+                          projectiles.owner[:count] == ENEMY_SHOT], axis=1)
+        powerups = np.array([(powerup.rect.centerx, powerup.rect.centery,
+                              POWERUP_TYPES.index(powerup.type)) for powerup in game.powerups],
+                            dtype=np.float32).reshape(-1, 3)
+        for key, rows in (('enemies', enemies), ('projectiles', shots), ('powerups', powerups)):
+            array = observations[key]
+            rows = nearest(rows, origin, len(array))
+            array[:len(rows)] = rows
+            array[len(rows):] = 0
+        observations['counts'][:] = (len(enemies), count, len(powerups))
+        observations['lives'][...] = player.lives
+        observations['score'][...] = game.score
+        observations['level'][...] = game.level
+        return observations
+
+    def render(self, scale=1, gray=False):
+        """Draw the current state and return the frame as pixels.
+
+        Args:
+            scale (int): Integer downscale factor.
+            gray (bool): Return 8-bit luma instead of RGB.
+
+        Returns:
+            np.ndarray: uint8 frame of shape (height, width) or (height, width, 3).
+        """
+        self.game.draw()
+        view = frame_view(spaceshooter.SCREEN)
+        frame = reduce_frames(view, scale, gray)
+        del view  # Unlock the screen
+        return frame
+
+def stack(observations):
+    """Stack a list of observations into one dict of batched arrays."""
+    return {key: np.stack([observation[key] for observation in observations])
+            for key in observations[0]}
+
+def episode_seed(seed, index, episode, num_envs):
+    """Return the seed of an environment's nth episode, unique across the batch."""
+    return (seed + index + episode * num_envs) % 2 ** 32
+
+class EnvGroup:
+    """Environments hosted by one worker, stepped together."""
+
+    def __init__(self, indices, num_envs, seed, env_kwargs):
+        """Create the environments.
+
+        Args:
+            indices (list): Positions of the environments in the whole batch.
+            num_envs (int): Size of the whole batch.
+            seed (int): Base seed of the batch.
+            env_kwargs (dict): Keyword arguments for GameEnv.
+        """
+        self.indices = indices
+        self.num_envs = num_envs
+        self.seed = seed
+        self.envs = [GameEnv(**env_kwargs) for _ in indices]
+        self.episodes = [0] * len(indices)
+
+    def reset(self):
+        """Reset every environment to its first episode."""
+        self.episodes = [0] * len(self.indices)
+        return stack([env.reset(episode_seed(self.seed, index, 0, self.num_envs))
+                      for env, index in zip(self.envs, self.indices)])
+
+    def step(self, actions):
+        """Step every environment, starting the next episode of finished ones.
+
+        Finished environments return the first observation of their next
+        episode, with the final figures of the finished one in ``info``.
+        """
+        observations = []
+        rewards = np.zeros(len(self.envs), dtype=np.int32)
+        dones = np.zeros(len(self.envs), dtype=bool)
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, rewards[i], dones[i], info = env.step(int(action))
+            if dones[i]:
+                self.episodes[i] += 1
+                observation = env.reset(episode_seed(
+                    self.seed, self.indices[i], self.episodes[i], self.num_envs))
+            observations.append(observation)
+            infos.append(info)
+        return stack(observations), rewards, dones, infos
+
+def worker(connection, indices, num_envs, seed, env_kwargs):
+    """Serve reset and step commands for a group of environments until closed."""
+    group = EnvGroup(indices, num_envs, seed, env_kwargs)
+    while True:
+        command, data = connection.recv()
+        if command == 'step':
+            connection.send(group.step(data))
+        elif command == 'reset':
+            connection.send(group.reset())
+        else:
+            connection.close()
+            return
+
+class VectorEnv:
+    """A batch of independent games spread over worker processes.
+
+    Each worker hosts a contiguous slice of the batch, so one message per
+    worker carries every action and observation of a step. Episodes reset
+    automatically when they end, and episode seeds are derived from the
+    base seed, so a batch replays identically for the same actions.
+    """
+
+    def __init__(self, num_envs, num_workers=None, seed=0, **env_kwargs):
+        """Start the workers.
+
+        Args:
+            num_envs (int): Number of games.
+            num_workers (int): Worker processes; defaults to one per CPU, and
+                never more than one per game. Zero runs every game in this
+                process.
+            seed (int): Base seed of the episodes.
+            **env_kwargs: Passed on to GameEnv.
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        # A worker without games would have nothing to stack
+        num_workers = min(num_workers, num_envs)
+        self.num_envs = num_envs
+        self.local = None
+        self.connections = []
+        self.processes = []
+        slices = np.array_split(np.arange(num_envs), max(num_workers, 1))
+        if num_workers == 0:
+            self.local = EnvGroup(list(range(num_envs)), num_envs, seed, env_kwargs)
+            return
+        # Workers start from a fresh interpreter so no SDL state is inherited
+        context = multiprocessing.get_context('spawn')
+        for indices in slices:
+            parent, child = context.Pipe()
+            process = context.Process(target=worker, daemon=True,
+                                      args=(child, indices.tolist(), num_envs, seed, env_kwargs))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.slices = [len(indices) for indices in slices]
+
+    def reset(self):
+        """Reset every game to its first episode.
+
+        Returns:
+            dict: Observations batched along a first axis of size ``num_envs``.
+        """
+        if self.local is not None:
+            return self.local.reset()
+        for connection in self.connections:
+            connection.send(('reset', None))
+        return self.concatenate([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        """Step every game by one action.
+
+        Args:
+            actions (array-like): One action bit mask per game.
+
+        Returns:
+            tuple: (observations, rewards, dones, infos) with one entry per game.
+        """
+        actions = np.asarray(actions)
+        if self.local is not None:
+            return self.local.step(actions)
+        start = 0
+        for connection, size in zip(self.connections, self.slices):
+            connection.send(('step', actions[start:start + size]))
+            start += size
+        results = [connection.recv() for connection in self.connections]
+        observations = self.concatenate([result[0] for result in results])
+        rewards = np.concatenate([result[1] for result in results])
+        dones = np.concatenate([result[2] for result in results])
+        infos = [info for result in results for info in result[3]]
+        return observations, rewards, dones, infos
+
+    @staticmethod
+    def concatenate(batches):
+        """Join per-worker observation batches into one."""
+        return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+    def close(self):
+        """Stop the workers."""
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
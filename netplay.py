@@ -0,0 +1,848 @@
+"""Authoritative game server and snapshot clients for networked play.
+
+``NetServer`` runs the simulation headlessly at the tick rate and sends
+every connected client a binary snapshot of all entities at the snapshot
+rate, delta-compressed against the last snapshot that client acknowledged.
+``NetClient`` decodes snapshots, renders entities interpolated a fixed delay
+behind the server, and sends its input and acknowledgements back. The first
+client that asks to play controls the ship; the others spectate::
+
+    python netplay.py server --port 5555
+    python netplay.py client --host 127.0.0.1 --port 5555
+    python netplay.py selftest --seconds 10 --clients 3
+
+Everything runs over UDP. A lost snapshot is simply never acknowledged, so
+the next one is encoded against an older baseline that the client has.
+"""
+import argparse
+import collections
+import json
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+import spaceshooter
+from env import ACTION_KEYS, ACTION_LEFT, ACTION_RIGHT, ACTION_UP
+from spaceshooter import (ENEMY_SHOT, HEIGHT, PLAYER_SHOT, PROJECTILE_IMAGES, TICK_RATE, WIDTH,
+                          BLACK, WHITE, Enemy, Explosion, Game, GlyphAtlas, Player, PowerUp,
+                          ShooterEnemy, StarryBackground, assets, get_font, percentiles)
+
+DEFAULT_PORT = 5555
+
+# Snapshots per second sent to each client, snapshots kept on both ends as
+# delta baselines, and seconds of silence after which a client is dropped
+SNAPSHOT_RATE = 30
+SNAPSHOT_HISTORY = 64
+CLIENT_TIMEOUT = 5.0
+
+# Clients draw the world this many seconds behind the newest snapshot, so
+# there is nearly always a later snapshot to interpolate toward
+INTERPOLATION_DELAY = 0.1
+CLIENT_FPS = 60
+
+# Largest UDP payload; larger snapshots are counted and skipped
+MAX_DATAGRAM = 65507
+
+# Packet types and headers. Clients send a hello until the first snapshot
+# arrives, then one input per frame carrying the newest snapshot they have
+# decoded, an input sequence number, held action flags and a wrapping count
+# of fire presses, so a lost packet never loses a shot.
+HELLO = 1
+INPUT = 2
+SNAPSHOT = 3
+HELLO_PACKET = struct.Struct('<BB')  # Type, wants to play
+INPUT_PACKET = struct.Struct('<BIIBB')  # Type, ack tick, sequence, held flags, presses
+# Type, tick, baseline tick, last input applied, score, lives, level,
+# weapon level, shield, flags
+SNAPSHOT_HEADER = struct.Struct('<BIIIiiHBBB')
+DELTA_COUNTS = struct.Struct('<III')  # Removed, added and changed entities
+NO_BASELINE = 0xFFFFFFFF
+FLAG_PLAYING = 1
+FLAG_CONTROLLING = 2
+
+# One snapshot entity. Positions are fixed point with POSITION_SCALE steps
+# per pixel; frame is the rotation bucket, or the animation frame of an explosion.
+ENTITY = np.dtype([('id', '<u4'), ('kind', 'u1'), ('frame', 'u1'), ('x', '<i2'), ('y', '<i2')])
+POSITION_SCALE = 4
+
+# Entity kinds and the image each is drawn with
+KIND_PLAYER = 0
+KIND_ENEMY = 1
+KIND_SHOOTER = 2
+KIND_WEAPON = 3
+KIND_BOMB = 4
+KIND_SHIELD = 5
+KIND_EXPLOSION = 6
+KIND_PLAYER_SHOT = 7
+KIND_ENEMY_SHOT = 8
+KIND_IMAGES = {
+    KIND_PLAYER: ('images/player_ship.png', (50, 50)),
+    KIND_ENEMY: ('images/enemy_ship.png', (50, 50)),
+    KIND_SHOOTER: ('images/shooter_enemy.png', (50, 50)),
+    KIND_WEAPON: ('images/powerup_weapon.png', (30, 30)),
+    KIND_BOMB: ('images/powerup_bomb.png', (30, 30)),
+    KIND_SHIELD: ('images/powerup_shield.png', (30, 30)),
+    KIND_PLAYER_SHOT: PROJECTILE_IMAGES[PLAYER_SHOT],
+    KIND_ENEMY_SHOT: PROJECTILE_IMAGES[ENEMY_SHOT],
+}
+POWERUP_KINDS = {'weapon': KIND_WEAPON, 'bomb': KIND_BOMB, 'shield': KIND_SHIELD}
+
+# Held flags the scripted selftest client cycles through
+BOT_MOVES = [ACTION_UP, ACTION_UP | ACTION_LEFT, 0, ACTION_LEFT, ACTION_UP | ACTION_RIGHT]
+
+# Projectile ids have the top bit set so they never clash with sprite ids
+PROJECTILE_ID = 0x80000000
+
+def encode_delta(state, baseline):
+    """Encode a snapshot as the changes from a baseline snapshot.
+
+    Entities missing from the baseline are sent in full, entities missing
+    from the snapshot by id, and entities that moved or changed frame as
+    position deltas. Unchanged entities cost nothing. Columns are written one
+    after another and compressed, since ids and deltas repeat a lot.
+
+    Args:
+        state (np.ndarray): ENTITY array sorted by id.
+        baseline (np.ndarray): ENTITY array sorted by id, or None to encode
+            every entity as added.
+
+    Returns:
+        bytes: The compressed delta.
+    """
+    if baseline is None:
+        baseline = np.zeros(0, ENTITY)
+    common, new_index, old_index = np.intersect1d(state['id'], baseline['id'],
+                                                  assume_unique=True, return_indices=True)
+    removed = np.setdiff1d(baseline['id'], common, assume_unique=True)
+    added = np.delete(state, new_index)
+    current = state[new_index]
+    previous = baseline[old_index]
+    moved = ((current['x'] != previous['x']) | (current['y'] != previous['y'])
+             | (current['frame'] != previous['frame']))
+    current = current[moved]
+    previous = previous[moved]
+    parts = [DELTA_COUNTS.pack(len(removed), len(added), len(current)),
+             np.diff(removed, prepend=np.uint32(0)).astype('<u4').tobytes()]
+    for name in ENTITY.names:
+        column = added[name]
+        if name == 'id':
+            column = np.diff(column, prepend=np.uint32(0))
+        parts.append(column.astype(ENTITY[name]).tobytes())
+    parts.append(np.diff(current['id'], prepend=np.uint32(0)).astype('<u4').tobytes())
+    parts.append(current['frame'].tobytes())
+    for name in ('x', 'y'):
+        # Differences of 16-bit positions wrap, and wrap back when decoded
+        parts.append((current[name] - previous[name]).astype('<i2').tobytes())
+    return zlib.compress(b''.join(parts), 1)
+
+def decode_delta(data, baseline):
+    """Rebuild a snapshot from a delta and the baseline it was encoded against.
+
+    Args:
+        data (bytes): Output of ``encode_delta``.
+        baseline (np.ndarray): The same baseline, or None for a full snapshot.
+
+    Returns:
+        np.ndarray: ENTITY array sorted by id.
+    """
+    data = zlib.decompress(data)
+    removed_count, added_count, changed_count = DELTA_COUNTS.unpack_from(data)
+    offset = DELTA_COUNTS.size
+    def column(dtype, count):
+        nonlocal offset
+        values = np.frombuffer(data, dtype, count, offset)
+        offset += values.nbytes
+        return values
+    removed = np.cumsum(column('<u4', removed_count), dtype=np.uint32)
+    added = np.zeros(added_count, ENTITY)
+    for name in ENTITY.names:
+        added[name] = column(ENTITY[name], added_count)
+    added['id'] = np.cumsum(added['id'], dtype=np.uint32)
+    changed = np.cumsum(column('<u4', changed_count), dtype=np.uint32)
+    frames = column('u1', changed_count)
+    dx = column('<i2', changed_count)
+    dy = column('<i2', changed_count)
+
+    state = np.zeros(0, ENTITY) if baseline is None else baseline.copy()
+    if removed_count:
+        state = state[~np.isin(state['id'], removed, assume_unique=True)]
+    if changed_count:
+        index = np.searchsorted(state['id'], changed)
+        state['frame'][index] = frames
+        state['x'][index] += dx
+        state['y'][index] += dy
+    if added_count:
+        state = np.concatenate((state, added))
+        state = state[np.argsort(state['id'], kind='stable')]
+    return state
+
+class RemoteClient:
+    """Server-side record of one connected client."""
+
+    def __init__(self, address, controlling):
+        """Initialize the record.
+
+        Args:
+            address (tuple): The client's (host, port).
+            controlling (bool): Whether the client's input steers the ship.
+        """
+        self.address = address
+        self.controlling = controlling
+        self.ack = NO_BASELINE  # Newest snapshot tick the client has decoded
+        self.sequence = 0  # Newest input applied
+        self.held = 0
+        self.presses = None  # Client's press count as of its newest input
+        self.pending = 0  # Presses not yet fired
+        self.last_seen = time.perf_counter()
+        self.bytes_sent = 0
+        self.snapshots = 0
+        self.full_snapshots = 0
+
+class NetServer:
+    """Headless authoritative simulation that streams snapshots over UDP."""
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT), seed=None, difficulty='Normal',
+                 tick_rate=TICK_RATE, snapshot_rate=SNAPSHOT_RATE):
+        """Open the socket and start a game.
+
+        Args:
+            address (tuple): (host, port) to listen on; port 0 picks a free one.
+            seed (int): Seed of the game RNG, or None for a random one.
+            difficulty (str): One of spaceshooter.DIFFICULTIES.
+            tick_rate (int): Simulation ticks per second.
+            snapshot_rate (int): Snapshots per second sent to each client.
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        self.socket.bind(address)
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.game = Game(rng=random.Random(seed), tick_rate=tick_rate, headless=True)
+        self.game.difficulty = difficulty
+        self.game.reset()
+        self.tick_rate = tick_rate
+        self.snapshot_interval = max(1, round(tick_rate / snapshot_rate))
+        self.tick = 0
+        self.clients = {}
+        self.history = collections.OrderedDict()  # Tick to ENTITY array
+        self.ids = {}  # Sprite to (entity id, frame) as of the last snapshot
+        self.next_id = 1
+        self.projectile_base = 0  # Serials used by projectiles of earlier games
+        self.stopping = threading.Event()
+
+        self.started = None
+        self.elapsed = 0
+        self.tick_times = []
+        self.encode_times = []
+        self.late_ticks = 0
+        self.games = 1
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.raw_bytes = 0
+        self.oversize = 0
+        self.entity_counts = []
+
+    def receive(self):
+        """Read every pending packet from the clients."""
+        now = time.perf_counter()
+        while True:
+            try:
+                data, address = self.socket.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            client = self.clients.get(address)
+            if data[:1] == bytes([HELLO]) and len(data) == HELLO_PACKET.size:
+                if client is None:
+                    _, play = HELLO_PACKET.unpack(data)
+                    controlling = bool(play) and not any(
+                        other.controlling for other in self.clients.values())
+                    client = self.clients[address] = RemoteClient(address, controlling)
+            elif data[:1] == bytes([INPUT]) and len(data) == INPUT_PACKET.size and client:
+                _, ack, sequence, held, presses = INPUT_PACKET.unpack(data)
+                if ack != NO_BASELINE and (client.ack == NO_BASELINE or ack > client.ack):
+                    client.ack = ack
+                if sequence > client.sequence:
+                    client.sequence = sequence
+                    client.held = held
+                    # Fire once per press counted since the newest earlier input
+                    if client.presses is None:
+                        client.presses = presses
+                    client.pending += (presses - client.presses) % 256
+                    client.presses = presses
+            else:
+                continue
+            client.last_seen = now
+        for address, client in list(self.clients.items()):
+            if now - client.last_seen > CLIENT_TIMEOUT:
+                del self.clients[address]
+
+    def controller(self):
+        """Return the client steering the ship, or None."""
+        for client in self.clients.values():
+            if client.controlling:
+                return client
+        return None
+
+    def step(self):
+        """Advance the game by one tick with the controlling client's input."""
+        game = self.game
+        held = ()
+        pressed = ()
+        client = self.controller()
+        if client is not None:
+            held = [key for flag, key in ACTION_KEYS if client.held & flag]
+            pressed = (pygame.K_SPACE,) * client.pending
+            client.pending = 0
+        if not game.step(held, pressed):
+            # The server keeps running: a lost game restarts straight away
+            self.projectile_base += game.projectiles.spawned
+            game.reset()
+            self.games += 1
+        self.tick += 1
+
+    def capture(self):
+        """Return every entity of the current tick as an ENTITY array sorted by id."""
+        game = self.game
+        sprites = list(game.all_sprites)
+        rows = np.zeros(len(sprites), ENTITY)
+        ids = {}
+        for i, sprite in enumerate(sprites):
+            if isinstance(sprite, Player):
+                kind, frame = KIND_PLAYER, assets.rotation_bucket(sprite.angle)
+            elif isinstance(sprite, ShooterEnemy):
+                kind, frame = KIND_SHOOTER, 0
+            elif isinstance(sprite, Enemy):
+                kind, frame = KIND_ENEMY, 0
+            elif isinstance(sprite, PowerUp):
+                kind, frame = POWERUP_KINDS[sprite.type], assets.rotation_bucket(sprite.angle)
+            elif isinstance(sprite, Explosion):
+                kind, frame = KIND_EXPLOSION, sprite.current_frame
+            else:
+                continue
+            known = self.ids.get(sprite)
+            # A pooled explosion restarting its animation is a new entity
+            if known is None or (kind == KIND_EXPLOSION and frame < known[1]):
+                known = (self.next_id, frame)
+                self.next_id += 1
+            ids[sprite] = (known[0], frame)
+            x, y = sprite.pos if hasattr(sprite, 'pos') else sprite.rect.center
+            rows[i] = (known[0], kind, frame, round(x * POSITION_SCALE), round(y * POSITION_SCALE))
+        self.ids = ids
+        rows = rows[rows['id'] != 0]
+
+        projectiles = game.projectiles
+        n = projectiles.count
+        shots = np.zeros(n, ENTITY)
+        shots['id'] = PROJECTILE_ID | ((projectiles.serial[:n] + self.projectile_base) & 0x7FFFFFFF)
+        shots['kind'] = np.where(projectiles.owner[:n] == ENEMY_SHOT, KIND_ENEMY_SHOT, KIND_PLAYER_SHOT)
+        shots['frame'] = projectiles.bucket[:n]
+        for name, values in (('x', projectiles.x[:n]), ('y', projectiles.y[:n])):
+            shots[name] = np.clip(np.round(values * POSITION_SCALE), -32768, 32767)
+        state = np.concatenate((rows, shots))
+        return state[np.argsort(state['id'], kind='stable')]
+
+    def header(self, client, baseline):
+        """Pack the snapshot header for one client."""
+        game = self.game
+        player = game.player
+        flags = (FLAG_PLAYING if game.playing else 0) | (FLAG_CONTROLLING if client.controlling else 0)
+        return SNAPSHOT_HEADER.pack(SNAPSHOT, self.tick, baseline, client.sequence, game.score,
+                                    player.lives, game.level, player.weapon_level,
+                                    player.shield, flags)
+
+    def broadcast(self):
+        """Send the current tick to every client, encoded against its last acknowledgement."""
+        started = time.perf_counter()
+        state = self.capture()
+        self.history[self.tick] = state
+        while len(self.history) > SNAPSHOT_HISTORY:
+            self.history.popitem(last=False)
+        self.entity_counts.append(len(state))
+        encoded = {}  # Clients acknowledging the same tick share one delta
+        for client in self.clients.values():
+            baseline = client.ack if client.ack in self.history else NO_BASELINE
+            if baseline not in encoded:
+                encoded[baseline] = encode_delta(state, self.history.get(baseline))
+            packet = self.header(client, baseline) + encoded[baseline]
+            if len(packet) > MAX_DATAGRAM:
+                self.oversize += 1
+                continue
+            try:
+                self.socket.sendto(packet, client.address)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                continue
+            client.bytes_sent += len(packet)
+            client.snapshots += 1
+            client.full_snapshots += baseline == NO_BASELINE
+            self.bytes_sent += len(packet)
+            self.packets_sent += 1
+            self.raw_bytes += SNAPSHOT_HEADER.size + state.nbytes
+        self.encode_times.append((time.perf_counter() - started) * 1000)
+
+    def run(self, duration=None):
+        """Serve ticks at the tick rate until stopped.
+
+        Args:
+            duration (float): Seconds to run, or None to run until ``stop``.
+        """
+        tick_time = 1 / self.tick_rate
+        self.started = time.perf_counter()
+        deadline = self.started
+        try:
+            self._serve(duration, tick_time, deadline)
+        finally:
+            self.elapsed = time.perf_counter() - self.started
+
+    def _serve(self, duration, tick_time, deadline):
+        """Tick until stopped or ``duration`` seconds after ``started``."""
+        while not self.stopping.is_set():
+            now = time.perf_counter()
+            if duration is not None and now - self.started >= duration:
+                break
+            if now < deadline:
+                time.sleep(deadline - now)
+                continue
+            self.receive()
+            self.step()
+            if self.tick % self.snapshot_interval == 0:
+                self.broadcast()
+            finished = time.perf_counter()
+            self.tick_times.append((finished - now) * 1000)
+            deadline += tick_time
+            if finished > deadline + tick_time:
+                # Too far behind to catch up: drop the missed ticks
+                self.late_ticks += 1
+                deadline = finished
+
+    def stop(self):
+        """Ask ``run`` to return after the current tick."""
+        self.stopping.set()
+
+    def close(self):
+        """Close the socket."""
+        self.socket.close()
+
+    def stats(self):
+        """Return tick timing and bandwidth figures.
+
+        Returns:
+            dict: Ticks served, tick and encode times in milliseconds, bytes
+            sent in total and per client, and how well deltas compress.
+        """
+        elapsed = self.elapsed
+        return {
+            'ticks': self.tick,
+            'games': self.games,
+            'tick_ms': percentiles(self.tick_times),
+            'encode_ms': percentiles(self.encode_times),
+            'late_ticks': self.late_ticks,
+            'entities': percentiles(self.entity_counts),
+            'packets_sent': self.packets_sent,
+            'bytes_sent': self.bytes_sent,
+            'bytes_per_packet': self.bytes_sent / max(self.packets_sent, 1),
+            'compression': self.bytes_sent / max(self.raw_bytes, 1),
+            'oversize': self.oversize,
+            'clients': [{
+                'address': f"{client.address[0]}:{client.address[1]}",
+                'controlling': client.controlling,
+                'kbit_per_second': client.bytes_sent * 8 / 1000 / max(elapsed, 1e-9),
+                'snapshots': client.snapshots,
+                'full_snapshots': client.full_snapshots,
+            } for client in self.clients.values()],
+        }
+
+class NetClient:
+    """Receives snapshots, interpolates them and sends input to a NetServer."""
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT), play=True, tick_rate=TICK_RATE,
+                 delay=INTERPOLATION_DELAY):
+        """Open the socket and say hello to the server.
+
+        Args:
+            address (tuple): The server's (host, port).
+            play (bool): Ask to control the ship rather than spectate.
+            tick_rate (int): The server's ticks per second.
+            delay (float): Seconds the rendered world trails the server.
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.connect(address)
+        self.socket.setblocking(False)
+        self.play = play
+        self.tick_rate = tick_rate
+        self.delay = delay
+        self.snapshots = collections.OrderedDict()  # Tick to (header dict, ENTITY array)
+        self.newest = None
+        self.server_tick = None  # Estimated server tick at time ``synced``
+        self.synced = 0
+        self.sequence = 0
+        self.presses = 0
+        self.sent = {}  # Input sequence to send time, for round trips
+        self.last_hello = 0
+        self.images = {}
+        self.atlas = None
+        self.background = None  # Local scenery, created with the first frame
+        self.last_render = None
+
+        self.bytes_received = 0
+        self.received = 0
+        self.full_received = 0
+        self.missing_baseline = 0
+        self.stale = 0
+        self.decode_times = []
+        self.lag = []
+        self.round_trips = []
+        self.starved = 0
+        self.frames = 0
+        self.started = time.perf_counter()
+
+    def poll(self):
+        """Decode every pending snapshot."""
+        now = time.perf_counter()
+        while True:
+            try:
+                data = self.socket.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionRefusedError:
+                continue
+            if len(data) < SNAPSHOT_HEADER.size or data[0] != SNAPSHOT:
+                continue
+            self.bytes_received += len(data)
+            self.received += 1
+            (_, tick, baseline, sequence, score, lives, level, weapon, shield,
+             flags) = SNAPSHOT_HEADER.unpack_from(data)
+            if self.newest is not None and tick <= self.newest:
+                self.stale += 1
+                continue
+            if baseline == NO_BASELINE:
+                base = None
+                self.full_received += 1
+            elif baseline in self.snapshots:
+                base = self.snapshots[baseline][1]
+            else:
+                self.missing_baseline += 1
+                continue
+            started = time.perf_counter()
+            state = decode_delta(data[SNAPSHOT_HEADER.size:], base)
+            self.decode_times.append((time.perf_counter() - started) * 1000)
+            info = {'tick': tick, 'score': score, 'lives': lives, 'level': level,
+                    'weapon_level': weapon, 'shield': shield,
+                    'playing': bool(flags & FLAG_PLAYING),
+                    'controlling': bool(flags & FLAG_CONTROLLING), 'received': now}
+            self.snapshots[tick] = (info, state)
+            while len(self.snapshots) > SNAPSHOT_HISTORY:
+                self.snapshots.popitem(last=False)
+            self.newest = tick
+            # Track the server clock by the snapshots that arrive soonest
+            if (self.server_tick is None
+                    or tick > self.server_tick + (now - self.synced) * self.tick_rate):
+                self.server_tick = tick
+                self.synced = now
+            sent = self.sent.pop(sequence, None)
+            if sent is not None:
+                self.round_trips.append((now - sent) * 1000)
+                self.sent = {key: value for key, value in self.sent.items() if key > sequence}
+
+    def send_input(self, held=0, fire=False):
+        """Send held action flags, a fire press and the newest acknowledgement.
+
+        Before the first snapshot this sends a hello instead, at most four
+        times a second.
+
+        Args:
+            held (int): Bit mask of ACTION_* movement flags.
+            fire (bool): Whether fire was pressed since the last call.
+        """
+        now = time.perf_counter()
+        if self.newest is None:
+            if now - self.last_hello >= 0.25:
+                self.last_hello = now
+                self._send(HELLO_PACKET.pack(HELLO, self.play))
+            return
+        if fire:
+            self.presses = (self.presses + 1) % 256
+        self.sequence += 1
+        self.sent[self.sequence] = now
+        self._send(INPUT_PACKET.pack(INPUT, self.newest, self.sequence, held & 0xFF, self.presses))
+
+    def _send(self, packet):
+        """Send a packet, ignoring a server that is not up yet."""
+        try:
+            self.socket.send(packet)
+        except (BlockingIOError, ConnectionRefusedError, InterruptedError):
+            pass
+
+    def interpolate(self, now=None):
+        """Return the world as it was ``delay`` seconds before the newest server tick.
+
+        Entities present in both surrounding snapshots are placed between
+        them; the rest appear or vanish with the nearer one. When no later
+        snapshot has arrived the newest one is held.
+
+        Args:
+            now (float): ``time.perf_counter()`` value; defaults to the current time.
+
+        Returns:
+            tuple: (header dict, ENTITY array with float x and y in pixels),
+            or None before the first snapshot.
+        """
+        if self.newest is None:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        server_tick = self.server_tick + (now - self.synced) * self.tick_rate
+        target = server_tick - self.delay * self.tick_rate
+        ticks = list(self.snapshots)
+        later = next((tick for tick in ticks if tick >= target), None)
+        if later is None:
+            self.starved += 1
+            later = ticks[-1]
+            target = later
+        earlier = max((tick for tick in ticks if tick <= target), default=later)
+        info, newer = self.snapshots[later]
+        older = self.snapshots[earlier][1]
+        self.frames += 1
+        # The drawn world is the newer snapshot wound back to the target
+        # tick; that snapshot left the server about half a round trip
+        # before it arrived
+        one_way = self.round_trips[-1] / 2000 if self.round_trips else 0
+        self.lag.append(((later - target) / self.tick_rate + now - info['received'] + one_way) * 1000)
+
+        alpha = 1.0 if later == earlier else (target - earlier) / (later - earlier)
+        world = np.zeros(len(newer), [('kind', 'u1'), ('frame', 'u1'), ('x', 'f4'), ('y', 'f4')])
+        world['kind'] = newer['kind']
+        world['frame'] = newer['frame']
+        world['x'] = newer['x'] / POSITION_SCALE
+        world['y'] = newer['y'] / POSITION_SCALE
+        if alpha < 1:
+            common, new_index, old_index = np.intersect1d(newer['id'], older['id'],
+                                                          assume_unique=True, return_indices=True)
+            x0 = older['x'][old_index] / POSITION_SCALE
+            y0 = older['y'][old_index] / POSITION_SCALE
+            x1 = world['x'][new_index]
+            y1 = world['y'][new_index]
+            # The ship wraps around the screen edges; don't sweep across it
+            near = (np.abs(x1 - x0) < WIDTH / 2) & (np.abs(y1 - y0) < HEIGHT / 2)
+            world['x'][new_index] = np.where(near, x0 + (x1 - x0) * alpha, x1)
+            world['y'][new_index] = np.where(near, y0 + (y1 - y0) * alpha, y1)
+            if alpha < 0.5:
+                # Entities that spawn in the later snapshot are not there yet
+                keep = np.zeros(len(newer), dtype=bool)
+                keep[new_index] = True
+                gone = np.delete(older, old_index)
+                ghosts = np.zeros(len(gone), world.dtype)
+                ghosts['kind'] = gone['kind']
+                ghosts['frame'] = gone['frame']
+                ghosts['x'] = gone['x'] / POSITION_SCALE
+                ghosts['y'] = gone['y'] / POSITION_SCALE
+                world = np.concatenate((world[keep], ghosts))
+        return info, world
+
+    def image(self, kind, frame):
+        """Return the surface drawn for an entity kind and frame."""
+        key = (kind, frame)
+        surface = self.images.get(key)
+        if surface is None:
+            if kind == KIND_EXPLOSION:
+                surface = assets.image(f'images/explosion{min(frame, 8)}.png', (75, 75))
+            elif kind in (KIND_ENEMY, KIND_SHOOTER):
+                surface = assets.image(*KIND_IMAGES[kind])
+            else:
+                surface = assets.rotation_frames(*KIND_IMAGES[kind])[frame % assets.rotation_steps][0]
+            self.images[key] = surface
+        return surface
+
+    def render(self, surface, now=None):
+        """Draw the interpolated world over a local star field, with a HUD.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            now (float): ``time.perf_counter()`` value; defaults to the current time.
+
+        Returns:
+            bool: Whether anything was drawn.
+        """
+        frame = self.interpolate(now)
+        if frame is None:
+            return False
+        info, world = frame
+        if now is None:
+            now = time.perf_counter()
+        if self.background is None:
+            self.background = StarryBackground(50, random.Random())
+            self.last_render = now
+        self.background.update(now - self.last_render)
+        self.last_render = now
+        surface.fill(BLACK)
+        self.background.draw(surface)
+        images = [self.image(kind, frame) for kind, frame in
+                  zip(world['kind'].tolist(), world['frame'].tolist())]
+        surface.blits([(image, image.get_rect(center=(x, y))) for image, x, y in
+                       zip(images, world['x'].tolist(), world['y'].tolist())], False)
+        if self.atlas is None:
+            self.atlas = GlyphAtlas(get_font('game'), WHITE)
+        role = "Playing" if info['controlling'] else "Spectating"
+        for i, line in enumerate((f"Score: {info['score']}", f"Lives: {info['lives']}",
+                                  f"Level: {info['level']}", role)):
+            surface.blit(self.atlas.render(line), (10, 10 + i * 30))
+        return True
+
+    def close(self):
+        """Close the socket."""
+        self.socket.close()
+
+    def stats(self):
+        """Return bandwidth, decode time, interpolation lag and round-trip figures.
+
+        Returns:
+            dict: Snapshots and bytes received, decode times, how long before
+            each frame the server was at the rendered tick, input round trips
+            and frames rendered without a later snapshot.
+        """
+        elapsed = time.perf_counter() - self.started
+        return {
+            'snapshots': self.received,
+            'full_snapshots': self.full_received,
+            'missing_baseline': self.missing_baseline,
+            'stale': self.stale,
+            'bytes_received': self.bytes_received,
+            'kbit_per_second': self.bytes_received * 8 / 1000 / elapsed,
+            'decode_ms': percentiles(self.decode_times),
+            'interpolation_lag_ms': percentiles(self.lag),
+            'round_trip_ms': percentiles(self.round_trips),
+            'frames': self.frames,
+            'starved_frames': self.starved,
+        }
+
+def bot_action(frame):
+    """Return the scripted client's (held flags, fire) for a frame.
+
+    The bot cycles through BOT_MOVES every half second and fires every
+    tenth frame.
+    """
+    return BOT_MOVES[frame // 30 % len(BOT_MOVES)], frame % 10 == 0
+
+def selftest(seconds=5.0, clients=2, seed=1, snapshot_rate=SNAPSHOT_RATE, render=False):
+    """Run a server and scripted clients over localhost and collect their figures.
+
+    The server ticks on a background thread; the clients share the calling
+    thread and run at CLIENT_FPS. The first client plays with a scripted
+    bot, the others spectate.
+
+    Args:
+        seconds (float): How long to run.
+        clients (int): Number of clients.
+        seed (int): Seed of the server game.
+        snapshot_rate (int): Snapshots per second per client.
+        render (bool): Also draw every client frame to an offscreen surface.
+
+    Returns:
+        dict: 'server' and 'clients' stats.
+    """
+    server = NetServer(('127.0.0.1', 0), seed=seed, snapshot_rate=snapshot_rate)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    players = [NetClient(server.address, play=i == 0) for i in range(clients)]
+    surface = pygame.Surface((WIDTH, HEIGHT)) if render else None
+    frame = 0
+    started = time.perf_counter()
+    try:
+        while time.perf_counter() - started < seconds:
+            held, fire = bot_action(frame)
+            for client in players:
+                client.poll()
+                client.send_input(held if client.play else 0, fire and client.play)
+                if surface is not None:
+                    client.render(surface)
+                else:
+                    client.interpolate()
+            frame += 1
+            next_frame = started + frame / CLIENT_FPS
+            time.sleep(max(0, next_frame - time.perf_counter()))
+    finally:
+        server.stop()
+        thread.join()
+        server.close()
+        for client in players:
+            client.close()
+    return {'server': server.stats(), 'clients': [client.stats() for client in players]}
+
+def play(address, spectate=False):
+    """Open a window and play or watch a game hosted by a server."""
+    screen = spaceshooter.init_display(headless=False)
+    client = NetClient(address, play=not spectate)
+    clock = pygame.time.Clock()
+    fire = False
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN
+                                                 and event.key == pygame.K_ESCAPE):
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    fire = True
+            keys = pygame.key.get_pressed()
+            held = sum(flag for flag, key in ACTION_KEYS if keys[key])
+            client.poll()
+            client.send_input(held, fire)
+            fire = False
+            client.render(screen)
+            pygame.display.flip()
+            clock.tick(CLIENT_FPS)
+    finally:
+        client.close()
+    return client.stats()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Py Space Shooter network play.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    server_parser = commands.add_parser('server', help="Run a headless authoritative server")
+    server_parser.add_argument('--host', default='0.0.0.0')
+    server_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    server_parser.add_argument('--seed', type=int)
+    server_parser.add_argument('--snapshot-rate', type=int, default=SNAPSHOT_RATE)
+    server_parser.add_argument('--seconds', type=float, help="Stop after this long")
+    client_parser = commands.add_parser('client', help="Join a server in a window")
+    client_parser.add_argument('--host', default='127.0.0.1')
+    client_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    client_parser.add_argument('--spectate', action='store_true', help="Watch without playing")
+    test_parser = commands.add_parser('selftest', help="Server and scripted clients over localhost")
+    test_parser.add_argument('--seconds', type=float, default=5.0)
+    test_parser.add_argument('--clients', type=int, default=2)
+    test_parser.add_argument('--seed', type=int, default=1)
+    test_parser.add_argument('--snapshot-rate', type=int, default=SNAPSHOT_RATE)
+    test_parser.add_argument('--render', action='store_true', help="Draw client frames offscreen")
+    args = parser.parse_args(argv)
+
+    if args.command == 'server':
+        server = NetServer((args.host, args.port), seed=args.seed,
+                           snapshot_rate=args.snapshot_rate)
+        print(f"Serving on {server.address[0]}:{server.address[1]}")
+        try:
+            server.run(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        server.close()
+        result = server.stats()
+    elif args.command == 'client':
+        result = play((args.host, args.port), args.spectate)
+        pygame.quit()
+    else:
+        spaceshooter.init_display(headless=True)
+        result = selftest(args.seconds, args.clients, args.seed, args.snapshot_rate, args.render)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,38 @@
+import os
+# Keep pygame's banner off stdout, which may be carrying captured video
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 import pygame
+import numpy as np
 import sys
 import math
 import random
 import json
-import os
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()  # Initialize the mixer for sounds and music
-
-# Screen settings
+import collections
+import threading
+import queue
+import bisect
+import atexit
+import struct
+import time
+import argparse
+import itertools
+import contextlib
+try:
+    import fcntl
+except ImportError:  # Windows locks byte ranges through msvcrt instead
+    fcntl = None
+    import msvcrt
+
+# Origin of the startup timing report, taken once pygame and numpy are imported
+IMPORT_STARTED = time.perf_counter()
+
+# Headless mode runs on SDL's dummy video and audio drivers, without a window or sound card
+HEADLESS = os.environ.get('SPACESHOOTER_HEADLESS', '') not in ('', '0')
+
+# Screen settings; the window is opened by init_display
 WIDTH = 800
 HEIGHT = 600
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Py Space Shooter")
+SCREEN = None
 
 # Color definitions
 BLACK = (0, 0, 0)
@@ -22,60 +41,2414 @@ GRAY = (100, 100, 100)
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 
-# Fonts
+# Simulation ticks per second, independent of the rendering frame rate
+TICK_RATE = 60
+# Rendering frame rate cap
+MAX_FPS = 60
+# Longest frame the simulation catches up on, so a stall cannot snowball
+MAX_FRAME_TIME = 0.25
+# Game time in seconds between level increases
+LEVEL_DURATION = 1000 / 60
+
+# Replay file layout
+REPLAY_MAGIC = b'PSSR'
+REPLAY_VERSION = 5
+REPLAY_HEADER = struct.Struct('<4sBIHB')  # Magic, version, seed, tick rate, difficulty
+REPLAY_HELD_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+DIFFICULTIES = ["Easy", "Normal", "Hard"]
+POWERUP_TYPES = ['weapon', 'bomb', 'shield']
+
+# Saved game states keep one row per sprite, in update order. The kind
+# names the sprite class, so images come from the asset cache on restore;
+# the meaning of the other fields depends on the kind.
+SPRITE_STATE = np.dtype([('kind', 'u1'), ('x', 'f8'), ('y', 'f8'), ('vx', 'f8'), ('vy', 'f8'),
+                         ('timer', 'f8'), ('value', 'i4')])
+STATE_PLAYER = 0
+STATE_ENEMY = 1
+STATE_SHOOTER = 2
+STATE_POWERUP = 3
+STATE_EXPLOSION = 4
+
+# Number of pre-rendered angle buckets per rotating sprite image
+ROTATION_STEPS = 72
+
+# Side length in pixels of a collision broad-phase grid cell
+GRID_CELL_SIZE = 64
+
+# Narrow-phase collision precision, the last tier a pair is tested with:
+# bounding rects, then bounding circles, then pixel masks
+COLLIDE_RECT = 0
+COLLIDE_CIRCLE = 1
+COLLIDE_MASK = 2
+
+# Above this many moved stars, the starfield reports one bounding dirty rect
+MAX_STAR_RECTS = 256
+
+# Maximum number of rendered text surfaces kept by the text cache
+TEXT_CACHE_SIZE = 256
+
+# High score files: the legacy JSON list, the append-only log and its top-N index
+RANKING_FILE = 'ranking.json'
+RANKING_LOG = 'ranking.jsonl'
+RANKING_INDEX = 'ranking_index.json'
+TOP_SCORES = 10
+
+# Above this many live projectiles, the dirty renderer redraws the whole frame
+MAX_DIRTY_PROJECTILES = 400
+
+# Explosion particles: the most alive at once, particles per enemy kill and
+# per bomb, fastest speed in pixels per second, longest life in seconds,
+# speed kept per 1/60 s, and the sheet's largest disc radius and its colors
+# from newest to oldest
+MAX_PARTICLES = 10000
+KILL_PARTICLES = 120
+BOMB_PARTICLES = 2000
+PARTICLE_SPEED = 250
+PARTICLE_LIFE = 0.8
+PARTICLE_DRAG = 0.94
+PARTICLE_RADIUS = 3
+PARTICLE_COLORS = [(255, 255, 220), (255, 240, 120), (255, 190, 60),
+                   (255, 120, 20), (220, 60, 10), (140, 30, 10)]
+
+# Frame profiler: frames kept for the overlay and trace, the key toggling the
+# overlay, and the overlay graph size in pixels
+PROFILE_FRAMES = 600
+PROFILE_KEY = pygame.K_F3
+PROFILE_GRAPH_WIDTH = 240
+PROFILE_GRAPH_HEIGHT = 60
+
+# Load governor: the frame budget is set by the frame cap; over a window of
+# frames, mean work above the high fraction of it steps quality down and
+# below the low fraction steps it back up, at most once per cooldown frames
+GOVERNOR_WINDOW = 60
+GOVERNOR_HIGH = 0.9
+GOVERNOR_LOW = 0.6
+GOVERNOR_COOLDOWN = 120
+# Most recent governor decisions kept in its log
+GOVERNOR_LOG_SIZE = 256
+
+# Effect quality from full to minimal: particle density, fraction of stars
+# drawn, screen shake scale, and whether kills play the explosion animation
+QUALITY_LEVELS = [
+    {'particles': 1.0, 'stars': 1.0, 'shake': 1.0, 'explosions': True},
+    {'particles': 0.5, 'stars': 0.7, 'shake': 1.0, 'explosions': True},
+    {'particles': 0.25, 'stars': 0.5, 'shake': 0.5, 'explosions': True},
+    {'particles': 0.1, 'stars': 0.3, 'shake': 0.5, 'explosions': False},
+    {'particles': 0.0, 'stars': 0.2, 'shake': 0.0, 'explosions': False},
+]
+
+# Gameplay caps, applied from simulation state so a seed always plays the
+# same: live enemies, live enemy shots and power-ups on screen, and the
+# load (enemies plus a tenth of the projectiles) above which spawns slow down
+MAX_ENEMIES = 40
+MAX_ENEMY_SHOTS = 200
+MAX_POWERUPS = 3
+SPAWN_LOAD_BUDGET = 30
+
+# Frame capture: luma weights (ITU-R BT.601) for grayscale frames, and how
+# many frames may wait for the writer thread before frames are dropped
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+CAPTURE_BUFFERS = 8
+
+# Fonts, loaded on first use
 # Replace 'fonts/space_font.ttf' with the path to your custom font
-title_font = pygame.font.Font('fonts/space_font.ttf', 54)
-menu_font = pygame.font.Font('fonts/space_font.ttf', 40)
-game_font = pygame.font.Font('fonts/space_font.ttf', 24)
+FONT_PATH = 'fonts/space_font.ttf'
+FONT_SIZES = {'title': 54, 'menu': 40, 'game': 24}
+
+# HUD lines, each composed again only when its value changes
+HUD_LINES = {'score': "Score: {}", 'lives': "Lives: {}", 'level': "Level: {}",
+             'weapon': "Weapon Lv{}", 'weapon_time': "Time: {}s", 'shield': "Shield: {}"}
+
+# Ways to fit the playfield to the window: 'smooth' and 'fast' resize it in
+# software once per frame (bilinear or nearest), 'sdl' leaves it to SDL's
+# SCALED mode, which stretches the whole 800x600 screen on the GPU
+SCALERS = ['smooth', 'fast', 'sdl']
+
+# Menus sleep until input arrives and redraw only when their content
+# changes; the start screen wakes this often to scroll the stars behind it
+MENU_ANIMATION_FPS = 15
+# Composed menu screens kept for reuse, enough for every start menu option
+MENU_LAYER_CACHE = 4
+# Window events after which the menu on screen must be drawn again
+MENU_REDRAW_EVENTS = {pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED}
+
+# Sound effects by name: file, priority (a higher one may take the voice of
+# a lower one when every channel is busy) and most voices playing at once
+SOUND_FILES = {
+    'shot': ('sounds/shot.ogg', 1, 3),
+    'explosion': ('sounds/explosion.ogg', 2, 3),
+    'powerup': ('sounds/powerup.ogg', 3, 1),
+    'life_loss': ('sounds/life_loss.ogg', 4, 1),
+}
+MUSIC_FILE = 'music/background.wav'
+SOUND_VOLUME = 0.5
+# Mixer channels shared by every sound effect
+AUDIO_CHANNELS = 8
+
+# Cold start budget in seconds, from import to the first menu frame
+STARTUP_BUDGET = 0.5
+
+class StartupTimer:
+    """Milestones of a cold start, in seconds since the module was imported."""
+
+    def __init__(self, origin):
+        """Initialize the timer.
+
+        Args:
+            origin (float): ``time.perf_counter()`` value milestones are measured from.
+        """
+        self.origin = origin
+        self.marks = {}
+
+    def mark(self, name):
+        """Record a milestone the first time it is reached.
+
+        Args:
+            name (str): Milestone name.
+        """
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+
+    def report(self, budget=STARTUP_BUDGET):
+        """Return a readable table of the milestones reached so far.
+
+        Args:
+            budget (float): Allowed seconds until the first menu frame.
+
+        Returns:
+            str: One line per milestone in the order reached, then the verdict.
+        """
+        lines = [f"Startup (budget {budget * 1000:.0f} ms to the menu):"]
+        previous = 0
+        for name, elapsed in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {name:12} {elapsed * 1000:8.1f} ms  (+{(elapsed - previous) * 1000:.1f})")
+            previous = elapsed
+        menu = self.marks.get('menu')
+        if menu is None:
+            lines.append("  The menu was not shown.")
+        elif menu <= budget:
+            lines.append(f"  Menu within budget by {(budget - menu) * 1000:.1f} ms.")
+        else:
+            lines.append(f"  Menu over budget by {(menu - budget) * 1000:.1f} ms.")
+        return "\n".join(lines)
+
+startup = StartupTimer(IMPORT_STARTED)
+
+def init_display(headless=HEADLESS, size=None, flags=0):
+    """Open the game window, initializing only the pygame modules the menus need.
+
+    The mixer is left to SoundBank, which opens it off the main thread. Calling
+    this again once the window is open does nothing.
+
+    Args:
+        headless (bool): Use SDL's dummy video and audio drivers.
+        size (tuple): Window size; defaults to WIDTH x HEIGHT.
+        flags (int): pygame display flags, such as SCALED or FULLSCREEN.
+
+    Returns:
+        pygame.Surface: The WIDTH x HEIGHT surface menus are drawn on, also
+        available as ``SCREEN``. It is the display surface itself when the
+        window is that size, and an offscreen surface otherwise.
+    """
+    global SCREEN
+    if SCREEN is None:
+        if headless:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+            os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        pygame.display.init()
+        pygame.font.init()
+        window = pygame.display.set_mode(size or (WIDTH, HEIGHT), flags)
+        SCREEN = window if window.get_size() == (WIDTH, HEIGHT) else pygame.Surface((WIDTH, HEIGHT))
+        pygame.display.set_caption("Py Space Shooter")
+        startup.mark('display')
+    return SCREEN
+
+def fit_rect(size):
+    """Return the largest WIDTH:HEIGHT rect centered in an area of a given size."""
+    scale = min(size[0] / WIDTH, size[1] / HEIGHT)
+    width, height = round(WIDTH * scale), round(HEIGHT * scale)
+    return pygame.Rect((size[0] - width) // 2, (size[1] - height) // 2, width, height)
+
+def parse_size(text):
+    """Parse a 'WIDTHxHEIGHT' command line argument into a (width, height) tuple."""
+    try:
+        width, height = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+_fonts = {}
+
+def get_font(name, scale=1):
+    """Return one of the game fonts, loading it on first use.
+
+    Args:
+        name (str): 'title', 'menu' or 'game', a key of FONT_SIZES.
+        scale (float): Size relative to FONT_SIZES, for text drawn at a
+            higher output resolution.
+
+    Returns:
+        pygame.font.Font: The shared font.
+    """
+    key = (name, round(FONT_SIZES[name] * scale))
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(FONT_PATH, key[1])
+        startup.mark(f'{name} font')
+    return font
+
+@contextlib.contextmanager
+def file_lock(file):
+    """Hold an exclusive lock on an open file, shared with other processes.
+
+    Args:
+        file: Open file object to lock.
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class RankingStore:
+    """Append-only high-score log with an incrementally maintained top-N index.
+
+    Each score is appended as one JSON line to the log. The best entries are
+    kept in memory and in a small index file, replaced atomically, that
+    records how many bytes of the log it covers. Loading reads the index and
+    replays only the log written after it. Disk writes happen on a
+    background thread so saving a score never blocks a frame. Appends are
+    made under a file lock, so stores in several processes can share the
+    files without losing each other's scores.
+    """
+
+    def __init__(self, log_path=RANKING_LOG, index_path=RANKING_INDEX,
+                 legacy_path=RANKING_FILE, size=TOP_SCORES):
+        """Initialize the store; files are read on first use.
+
+        Args:
+            log_path (str): Path of the append-only score log.
+            index_path (str): Path of the top-N index file.
+            legacy_path (str): Path of an old ``ranking.json`` to migrate.
+            size (int): Number of top entries kept.
+        """
+        self.log_path = log_path
+        self.index_path = index_path
+        self.legacy_path = legacy_path
+        self.size = size
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.writer = None
+        self.loaded = False
+        # Entries are (-score, sequence, name) so ties keep insertion order
+        self.top = []  # Best entries including scores not yet on disk
+        self.count = 0
+        self.index_top = []  # Best entries already written to the log
+        self.index_count = 0
+        self.offset = 0  # Bytes of the log reflected in memory
+
+    def _insert(self, top, entry):
+        """Insert an entry into a sorted top list and trim it to size."""
+        bisect.insort(top, entry)
+        del top[self.size:]
+
+    def _migrate(self):
+        """Convert a legacy ``ranking.json`` into the log if no log exists yet."""
+        if os.path.exists(self.log_path) or not os.path.exists(self.legacy_path):
+            return
+        with open(self.legacy_path, 'r') as file:
+            data = json.load(file)
+        temp_path = self.log_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for entry in data:
+                file.write(json.dumps({'name': entry['name'], 'score': entry['score']}) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.log_path)
+
+    def _load(self):
+        """Read the index and replay the log written after it."""
+        try:
+            self._migrate()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error migrating ranking: {e}", file=sys.stderr)
+        try:
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+            if index['offset'] <= os.path.getsize(self.log_path):
+                self.index_top = [tuple(entry) for entry in index['top']]
+                self.index_count = index['count']
+                self.offset = index['offset']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # Missing or stale index; rebuild it from the whole log
+        self.top = list(self.index_top)
+        self.count = self.index_count
+        self._replay()
+        self.loaded = True
+
+    def _replay(self, end=None):
+        """Fold complete log lines past the known offset into the top lists.
+
+        Args:
+            end (int): Log offset to stop at; defaults to the end of the log.
+        """
+        try:
+            with open(self.log_path, 'rb') as file:
+                file.seek(self.offset)
+                data = file.read() if end is None else file.read(end - self.offset)
+        except OSError:
+            return
+        # A torn last line from a crash is skipped until it is completed
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+                item = (-entry['score'], self.count, entry['name'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.count += 1
+            self.index_count += 1
+            self._insert(self.top, item)
+            self._insert(self.index_top, item)
+        self.offset += end
+
+    def add(self, name, score):
+        """Record a score; it is ranked at once and written in the background.
+
+        Args:
+            name (str): Player's initials.
+            score (int): Player's score.
+        """
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            entry = (-score, self.count, name)
+            self.count += 1
+            self._insert(self.top, entry)
+        self.queue.put(entry)
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+
+    def ranking(self):
+        """Return the best entries, best first.
+
+        Returns:
+            list: Dictionaries with keys 'name' and 'score'.
+        """
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            elif self.queue.unfinished_tasks == 0:
+                # Pick up scores appended by another process
+                try:
+                    if os.path.getsize(self.log_path) > self.offset:
+                        self._replay()
+                except OSError:
+                    pass
+            return [{'name': name, 'score': -score} for score, _, name in self.top]
+
+    def flush(self):
+        """Block until every recorded score has been written to disk."""
+        self.queue.join()
+
+    def _write_loop(self):
+        """Write queued scores to the log and refresh the index, forever."""
+        while True:
+            entry = self.queue.get()
+            try:
+                self._write(entry)
+            except OSError as e:
+                print(f"Error saving score: {e}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    def _write(self, entry):
+        """Append one entry to the log and atomically replace the index."""
+        score, _, name = entry
+        line = json.dumps({'name': name, 'score': -score}) + '\n'
+        with open(self.log_path, 'a', encoding='utf-8') as file, file_lock(file):
+            file.seek(0, os.SEEK_END)
+            start = file.tell()
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+            offset = file.tell()
+            with self.lock:
+                # Scores other processes appended since the last replay come
+                # before this one; the index written below covers them too
+                self._replay(start)
+                self.offset = offset
+                self.index_count += 1
+                self._insert(self.index_top, entry)
+                index = {'offset': offset, 'count': self.index_count,
+                         'top': [list(item) for item in self.index_top]}
+            # Still under the file lock, so processes never share the temp file
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w') as index_file:
+                json.dump(index, index_file)
+                index_file.flush()
+                os.fsync(index_file.fileno())
+            os.replace(temp_path, self.index_path)
+
+ranking_store = RankingStore()
+atexit.register(ranking_store.flush)
 
 def save_score(name, score):
-    """Save the player's score to a JSON file.
+    """Save the player's score without waiting for the disk.
 
     Args:
         name (str): Player's initials.
         score (int): Player's score.
     """
-    try:
-        data = []
-        if os.path.exists('ranking.json'):
-            with open('ranking.json', 'r') as file:
-                data = json.load(file)
-        data.append({'name': name, 'score': score})
-        with open('ranking.json', 'w') as file:
-            json.dump(data, file)
-    except Exception as e:
-        print(f"Error saving score: {e}")
+    ranking_store.add(name, score)
 
 def load_ranking():
-    """Load the ranking from a JSON file.
+    """Load the ranking.
 
     Returns:
-        list: Sorted list of dictionaries with keys 'name' and 'score'.
+        list: Best entries first, as dictionaries with keys 'name' and 'score'.
     """
-    try:
-        if os.path.exists('ranking.json'):
-            with open('ranking.json', 'r') as file:
-                data = json.load(file)
-                return sorted(data, key=lambda x: x['score'], reverse=True)
+    return ranking_store.ranking()
+
+class AssetCache:
+    """Process-wide registry of scaled sprite surfaces and their collision masks.
+
+    Surfaces and masks are keyed by (path, size), so every sprite created from
+    the same image shares one decoded surface and one mask. Rotating sprites
+    look up pre-rendered angle buckets instead of rotating every frame.
+    """
+
+    def __init__(self, rotation_steps=ROTATION_STEPS):
+        """Initialize an empty cache.
+
+        Args:
+            rotation_steps (int): Number of angle buckets rendered per rotating image.
+        """
+        self.surfaces = {}
+        self.masks = {}
+        self.rotations = {}
+        self.radii = {}
+        self.rotation_steps = rotation_steps
+        self.resized = {}
+        self.hits = 0
+        self.misses = 0
+
+    def scaled(self, surface, scale):
+        """Return a cached copy of a shared surface resized by a factor.
+
+        Used to draw world-sized images onto a playfield rendered at another
+        resolution.
+
+        Args:
+            surface (pygame.Surface): A surface from this cache.
+            scale (float): Resize factor; 1 returns the surface itself.
+
+        Returns:
+            pygame.Surface: Shared surface; callers must not draw on it.
+        """
+        if scale == 1:
+            return surface
+        key = (surface, scale)
+        resized = self.resized.get(key)
+        if resized is None:
+            resized = self.resized[key] = pygame.transform.smoothscale_by(surface, scale)
+        return resized
+
+    def image(self, path, size):
+        """Return the surface for an image file scaled to a given size.
+
+        Args:
+            path (str): Path to the image file.
+            size (tuple): Target (width, height) of the surface.
+
+        Returns:
+            pygame.Surface: Shared surface; callers must not draw on it.
+        """
+        key = (path, tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = pygame.image.load(path).convert_alpha()
+            surface = pygame.transform.scale(surface, key[1])
+            self.surfaces[key] = surface
         else:
+            self.hits += 1
+        return surface
+
+    def mask(self, path, size):
+        """Return the collision mask for an image file scaled to a given size.
+
+        Args:
+            path (str): Path to the image file.
+            size (tuple): Target (width, height) of the surface.
+
+        Returns:
+            pygame.mask.Mask: Shared mask built from the cached surface.
+        """
+        key = (path, tuple(size))
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.image(path, size))
+            self.masks[key] = mask
+        return mask
+
+    def radius(self, path, size):
+        """Return the radius of a circle around an image's center holding all its opaque pixels.
+
+        The circle also bounds every rotation of the image, and has a pixel of
+        margin for centers that rects round to whole pixels.
+
+        Args:
+            path (str): Path to the image file.
+            size (tuple): Target (width, height) of the surface.
+
+        Returns:
+            float: Radius in pixels.
+        """
+        key = (path, tuple(size))
+        radius = self.radii.get(key)
+        if radius is None:
+            # Same alpha threshold as pygame.mask.from_surface
+            x, y = np.nonzero(pygame.surfarray.array_alpha(self.image(path, size)) > 127)
+            if len(x):
+                dx = np.abs(x + 0.5 - size[0] / 2) + 0.5
+                dy = np.abs(y + 0.5 - size[1] / 2) + 0.5
+                radius = float(np.sqrt(dx * dx + dy * dy).max()) + 1
+            else:
+                radius = 0.0
+            self.radii[key] = radius
+        return radius
+
+    def rotated(self, path, size, angle):
+        """Return the pre-rendered rotation of an image closest to an angle.
+
+        All buckets for an image are rendered together on first use, so the
+        memory held per image is fixed by ``rotation_steps``.
+
+        Args:
+            path (str): Path to the image file.
+            size (tuple): Target (width, height) of the unrotated surface.
+            angle (float): Rotation in degrees, counterclockwise.
+
+        Returns:
+            tuple: (pygame.Surface, pygame.mask.Mask) for the nearest bucket.
+        """
+        return self.rotation_frames(path, size)[self.rotation_bucket(angle)]
+
+    def rotation_bucket(self, angle):
+        """Return the index of the angle bucket closest to an angle in degrees."""
+        return round(angle % 360 * self.rotation_steps / 360) % self.rotation_steps
+
+    def rotation_frames(self, path, size):
+        """Return every pre-rendered rotation of an image, rendering them on first use.
+
+        Args:
+            path (str): Path to the image file.
+            size (tuple): Target (width, height) of the unrotated surface.
+
+        Returns:
+            list: (pygame.Surface, pygame.mask.Mask) per angle bucket.
+        """
+        key = (path, tuple(size))
+        frames = self.rotations.get(key)
+        if frames is None:
+            image = self.image(path, size)
+            step = 360 / self.rotation_steps
+            frames = []
+            for i in range(self.rotation_steps):
+                rotated = pygame.transform.rotate(image, i * step)
+                frames.append((rotated, pygame.mask.from_surface(rotated)))
+            self.rotations[key] = frames
+        return frames
+
+    def preload(self):
+        """Load every sprite image used by the game so gameplay never hits the disk."""
+        for path, size in SPRITE_ASSETS:
+            self.mask(path, size)
+        for path, size in ROTATING_ASSETS:
+            self.rotated(path, size, 0)
+
+    def stats(self):
+        """Return the cache counters.
+
+        Returns:
+            dict: Number of cached surfaces and masks, hits and misses.
+        """
+        return {
+            'surfaces': len(self.surfaces),
+            'masks': len(self.masks),
+            'rotation_frames': sum(len(frames) for frames in self.rotations.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+# Every (image path, size) pair used by the sprite classes
+SPRITE_ASSETS = [
+    ('images/player_ship.png', (50, 50)),
+    ('images/laser.png', (10, 30)),
+    ('images/enemy_laser.png', (9, 30)),
+    ('images/enemy_ship.png', (50, 50)),
+    ('images/shooter_enemy.png', (50, 50)),
+    ('images/powerup_weapon.png', (30, 30)),
+    ('images/powerup_bomb.png', (30, 30)),
+    ('images/powerup_shield.png', (30, 30)),
+    ('images/powerup.png', (30, 30)),
+] + [(f'images/explosion{i}.png', (75, 75)) for i in range(9)]
+
+# Owners of projectiles, indexing PROJECTILE_IMAGES
+PLAYER_SHOT = 0
+ENEMY_SHOT = 1
+PROJECTILE_IMAGES = [('images/laser.png', (10, 30)), ('images/enemy_laser.png', (9, 30))]
+
+# Images drawn at arbitrary angles, pre-rendered in ROTATION_STEPS buckets
+ROTATING_ASSETS = SPRITE_ASSETS[:3] + SPRITE_ASSETS[5:9]
+
+assets = AssetCache()
+
+class SoundBank:
+    """Sound effects and background music on a fixed pool of mixer channels.
+
+    The mixer is opened and the files decoded off the main thread, so the
+    menu does not wait for the audio device. Sounds played before they have
+    loaded are skipped.
+
+    Each sound has a voice cap and a priority. A sound at its cap restarts
+    its own oldest voice. When every channel is busy, it takes the oldest
+    voice of the lowest priority no higher than its own, or is dropped.
+    Requests for a sound already started in the same frame are merged, so a
+    bomb clearing the screen plays one explosion, not dozens.
+    """
+
+    def __init__(self, files=SOUND_FILES, music=MUSIC_FILE, volume=SOUND_VOLUME,
+                 num_channels=AUDIO_CHANNELS):
+        """Initialize the bank; nothing is loaded until ``start``.
+
+        Args:
+            files (dict): (path, priority, max voices) per sound name.
+            music (str): Path of the looping background music.
+            volume (float): Initial volume of the sounds and the music, 0 to 1.
+            num_channels (int): Size of the channel pool.
+        """
+        self.files = files
+        self.music = music
+        self.volume = volume
+        self.music_volume = volume
+        self.num_channels = num_channels
+        self.sounds = {}
+        self.channels = []
+        # Per channel, the (sound name, priority, start sequence) of its last voice
+        self.voices = []
+        self.sequence = 0
+        self.frame_sounds = set()
+        self.counters = collections.Counter()
+        self.peak_voices = 0
+        self.loader = None
+        self.ready = threading.Event()
+
+    def start(self, play_music=True):
+        """Start loading in the background, once.
+
+        Args:
+            play_music (bool): Start the background music once it has loaded.
+        """
+        if self.loader is None:
+            self.loader = threading.Thread(target=self._load, args=(play_music,), daemon=True)
+            self.loader.start()
+
+    def _load(self, play_music):
+        """Open the mixer, decode every sound and start the music."""
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Error opening the audio device: {e}", file=sys.stderr)
+            self.ready.set()
+            return
+        pygame.mixer.set_num_channels(self.num_channels)
+        self.voices = [None] * self.num_channels
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+        for name, (path, priority, max_voices) in self.files.items():
+            try:
+                sound = pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Error loading sound {path}: {e}", file=sys.stderr)
+                continue
+            sound.set_volume(self.volume)
+            self.sounds[name] = sound
+        if play_music:
+            try:
+                pygame.mixer.music.load(self.music)
+                pygame.mixer.music.set_volume(self.music_volume)
+                pygame.mixer.music.play(-1)  # Loop indefinitely
+            except pygame.error as e:
+                print(f"Error loading music {self.music}: {e}", file=sys.stderr)
+        startup.mark('audio')
+        self.ready.set()
+
+    def wait(self, timeout=None):
+        """Block until loading has finished.
+
+        Args:
+            timeout (float): Seconds to wait at most, or None to wait indefinitely.
+
+        Returns:
+            bool: Whether loading has finished.
+        """
+        return self.ready.wait(timeout)
+
+    def begin_frame(self):
+        """Start a new frame; only repeats within one frame are merged."""
+        self.frame_sounds.clear()
+
+    def play(self, name):
+        """Play a sound effect on a pooled channel if it has loaded.
+
+        Args:
+            name (str): Sound name, a key of the bank's files.
+
+        Returns:
+            bool: Whether a voice was started.
+        """
+        sound = self.sounds.get(name)
+        if sound is None:
+            return False
+        if name in self.frame_sounds:
+            self.counters['merged'] += 1
+            return False
+        self.frame_sounds.add(name)
+        path, priority, max_voices = self.files[name]
+
+        free = None
+        own = []  # (sequence, channel index) of this sound's playing voices
+        victim = None  # (priority, sequence, channel index) of the best voice to steal
+        busy = 0
+        for i, channel in enumerate(self.channels):
+            voice = self.voices[i]
+            if voice is None or not channel.get_busy():
+                if free is None:
+                    free = i
+                continue
+            busy += 1
+            if voice[0] == name:
+                own.append((voice[2], i))
+            if voice[1] <= priority and (victim is None or (voice[1], voice[2]) < victim[:2]):
+                victim = (voice[1], voice[2], i)
+
+        if len(own) >= max_voices:
+            index = min(own)[1]
+            self.counters['capped'] += 1
+        elif free is not None:
+            index = free
+            busy += 1
+        elif victim is not None:
+            index = victim[2]
+            self.counters['stolen'] += 1
+        else:
+            self.counters['dropped'] += 1
+            return False
+        self.sequence += 1
+        self.channels[index].play(sound)
+        self.voices[index] = (name, priority, self.sequence)
+        self.counters['played'] += 1
+        self.peak_voices = max(self.peak_voices, busy)
+        return True
+
+    def stats(self):
+        """Return the voice counters.
+
+        Returns:
+            dict: Voices playing now and at most; requests played, merged
+            within a frame, restarted at their cap, stolen from lower
+            priorities and dropped.
+        """
+        voices = sum(1 for i, channel in enumerate(self.channels)
+                     if self.voices[i] is not None and channel.get_busy())
+        return {
+            'voices': voices,
+            'peak_voices': self.peak_voices,
+            'channels': len(self.channels),
+            **{key: self.counters[key]
+               for key in ('played', 'merged', 'capped', 'stolen', 'dropped')},
+        }
+
+    def set_music_volume(self, volume):
+        """Set the music volume, now or as soon as the music has loaded.
+
+        Args:
+            volume (float): Volume from 0 to 1.
+        """
+        self.music_volume = volume
+        if self.ready.is_set() and pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(volume)
+
+class SpritePool:
+    """Recycles killed sprites of one class instead of leaving them to the GC."""
+
+    def __init__(self, sprite_class):
+        """Initialize an empty pool.
+
+        Args:
+            sprite_class (type): PooledSprite subclass managed by this pool.
+        """
+        self.sprite_class = sprite_class
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, groups, *args):
+        """Take a sprite from the pool, or create one if the pool is empty.
+
+        Args:
+            groups (tuple): Sprite groups the sprite is added to.
+            *args: Arguments passed to the sprite's ``reset`` (or constructor).
+
+        Returns:
+            PooledSprite: A live sprite in the given groups.
+        """
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.reused += 1
+        else:
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.allocated += 1
+        sprite.add(*groups)
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def release(self, sprite):
+        """Return a killed sprite to the pool.
+
+        Args:
+            sprite (PooledSprite): Sprite that was removed from all its groups.
+        """
+        self.in_use -= 1
+        self.free.append(sprite)
+
+    def stats(self):
+        """Return the pool counters.
+
+        Returns:
+            dict: Pool size, sprites in use, high-water mark and allocation counts.
+        """
+        return {
+            'size': self.in_use + len(self.free),
+            'in_use': self.in_use,
+            'high_water': self.high_water,
+            'allocated': self.allocated,
+            'reused': self.reused,
+        }
+
+class SpatialHash:
+    """Uniform grid of sprites used as a broad phase for collision tests.
+
+    Each sprite is filed under every cell its rect overlaps. Only sprites
+    sharing a cell with the queried rect are handed to the narrow-phase test,
+    which gives the same hits as testing every pair.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        """Initialize an empty grid.
+
+        Args:
+            cell_size (int): Side length of a grid cell in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.spans = {}
+
+    def _span(self, rect):
+        """Return the (x0, y0, x1, y1) range of cells covered by a rect."""
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def move(self, sprite):
+        """Insert a sprite, or refile it if its rect now covers other cells.
+
+        Args:
+            sprite (pygame.sprite.Sprite): Sprite with an up-to-date rect.
+        """
+        span = self._span(sprite.rect)
+        old_span = self.spans.get(sprite)
+        if span == old_span:
+            return
+        if old_span is not None:
+            self._unfile(sprite, old_span)
+        self.spans[sprite] = span
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), {})[sprite] = None
+
+    def remove(self, sprite):
+        """Remove a sprite from the grid if it is filed there."""
+        span = self.spans.pop(sprite, None)
+        if span is not None:
+            self._unfile(sprite, span)
+
+    def _unfile(self, sprite, span):
+        """Remove a sprite from every cell in a span."""
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self.cells[(cx, cy)]
+                del cell[sprite]
+                if not cell:
+                    del self.cells[(cx, cy)]
+
+    def sync(self, group):
+        """Bring the grid in line with a sprite group after sprites moved.
+
+        Sprites that left the group are dropped, and only sprites that
+        crossed a cell boundary are refiled.
+
+        Args:
+            group (pygame.sprite.Group): Group whose sprites the grid tracks.
+        """
+        for sprite in [sprite for sprite in self.spans if sprite not in group]:
+            self.remove(sprite)
+        for sprite in group:
+            self.move(sprite)
+
+    def query(self, rect):
+        """Return the live sprites filed in any cell a rect overlaps.
+
+        Sprites killed since they were filed stay in the grid until the next
+        ``sync`` but are never returned, as a group would no longer hold them.
+
+        Args:
+            rect (pygame.Rect): Area to look up.
+
+        Returns:
+            list: Candidate sprites, each listed once.
+        """
+        x0, y0, x1, y1 = self._span(rect)
+        candidates = {}
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    candidates.update(cell)
+        return [sprite for sprite in candidates if sprite.alive()]
+
+    def spritecollide(self, sprite, dokill, collided=pygame.sprite.collide_mask):
+        """Grid-accelerated equivalent of ``pygame.sprite.spritecollide``.
+
+        Args:
+            sprite (pygame.sprite.Sprite): Sprite to test.
+            dokill (bool): Kill the sprites that were hit.
+            collided (callable): Narrow-phase test for a candidate pair.
+
+        Returns:
+            list: Sprites from the grid that collide with ``sprite``.
+        """
+        hits = [other for other in self.query(sprite.rect) if collided(sprite, other)]
+        if dokill:
+            for other in hits:
+                self.remove(other)
+                other.kill()
+        return hits
+
+    def groupcollide(self, group, dokilla, dokillb, collided=pygame.sprite.collide_mask):
+        """Grid-accelerated equivalent of ``pygame.sprite.groupcollide``.
+
+        Args:
+            group (pygame.sprite.Group): Sprites tested against the grid.
+            dokilla (bool): Kill sprites from ``group`` that were hit.
+            dokillb (bool): Kill sprites from the grid that were hit.
+            collided (callable): Narrow-phase test for a candidate pair.
+
+        Returns:
+            dict: Maps each sprite in ``group`` to the grid sprites it hit.
+        """
+        crashed = {}
+        for sprite in group.sprites():
+            hits = self.spritecollide(sprite, dokillb, collided)
+            if hits:
+                crashed[sprite] = hits
+                if dokilla:
+                    sprite.kill()
+        return crashed
+
+class NarrowPhase:
+    """Tiered collision test for sprite pairs: rects, then circles, then masks.
+
+    Each sprite class sets ``precision`` to the last tier it needs, and
+    ``radius`` to a circle around its center bounding its image. A pair is
+    tested up to the lower precision of its two sprites, capped by
+    ``max_precision``, and each tier only sees the pairs the cheaper ones
+    let through. An instance is a ``collided`` callable for ``SpatialHash``.
+    """
+
+    def __init__(self, max_precision=COLLIDE_MASK):
+        """Initialize the counters.
+
+        Args:
+            max_precision (int): Highest tier used for any pair.
+        """
+        self.max_precision = max_precision
+        self.counters = collections.Counter()
+
+    def __call__(self, a, b):
+        """Return whether two sprites collide."""
+        counters = self.counters
+        counters['pairs'] += 1
+        if not a.rect.colliderect(b.rect):
+            counters['rect'] += 1
+            return False
+        precision = min(a.precision, b.precision, self.max_precision)
+        if precision >= COLLIDE_CIRCLE:
+            dx = a.rect.centerx - b.rect.centerx
+            dy = a.rect.centery - b.rect.centery
+            reach = a.radius + b.radius
+            if dx * dx + dy * dy > reach * reach:
+                counters['circle'] += 1
+                return False
+            if precision == COLLIDE_MASK and not pygame.sprite.collide_mask(a, b):
+                counters['mask'] += 1
+                return False
+        counters['hits'] += 1
+        return True
+
+    def stats(self):
+        """Return the counters.
+
+        Returns:
+            dict: Pairs tested, pairs rejected by each tier, and hits.
+        """
+        return {key: self.counters[key] for key in ('pairs', 'rect', 'circle', 'mask', 'hits')}
+
+class ProjectileSystem:
+    """Every live projectile, stored as parallel NumPy arrays.
+
+    Movement, off-screen culling and compaction run as one vectorized pass
+    per tick, and drawing is a single ``Surface.blits`` call. Each projectile
+    records its owner, which picks its image and what it can hit, and a
+    serial number counting up from the first spawn, which identifies it
+    across compactions.
+    """
+
+    precision = COLLIDE_MASK  # Narrow-phase tier for projectile hits
+
+    def __init__(self, capacity=256):
+        """Initialize an empty system.
+
+        Args:
+            capacity (int): Initial array size; arrays double when full.
+        """
+        self.count = 0
+        self.high_water = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.bucket = np.zeros(capacity, dtype=np.int32)
+        self.owner = np.zeros(capacity, dtype=np.int32)
+        self.serial = np.zeros(capacity, dtype=np.int64)
+        self.spawned = 0
+        self.last_delta_time = 0
+        self.drawn_rects = []
+        self.bounds = None  # (frame, left, top) of live projectiles since the last move
+
+        # Rotated frames of every owner's image, indexed owner * steps + bucket
+        self.steps = assets.rotation_steps
+        self.frames = []
+        for path, size in PROJECTILE_IMAGES:
+            self.frames.extend(assets.rotation_frames(path, size))
+        self.surfaces = [surface for surface, mask in self.frames]
+        self.half_width = np.array([surface.get_width() // 2 for surface in self.surfaces])
+        self.half_height = np.array([surface.get_height() // 2 for surface in self.surfaces])
+        self.widths = np.array([surface.get_width() for surface in self.surfaces])
+        self.heights = np.array([surface.get_height() for surface in self.surfaces])
+        self.radii = [assets.radius(path, size) for path, size in PROJECTILE_IMAGES]
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        """Double the capacity of every array."""
+        for name in ('x', 'y', 'vx', 'vy', 'bucket', 'owner', 'serial'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate((array, np.zeros_like(array))))
+
+    def spawn(self, position, velocity, angle, owner):
+        """Add a projectile.
+
+        Args:
+            position (tuple): Starting position of the projectile.
+            velocity (pygame.math.Vector2): Velocity vector of the projectile.
+            angle (float): Angle at which the projectile is fired.
+            owner (int): PLAYER_SHOT or ENEMY_SHOT.
+        """
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i], self.y[i] = position
+        self.vx[i], self.vy[i] = velocity
+        self.bucket[i] = assets.rotation_bucket(angle)
+        self.owner[i] = owner
+        self.serial[i] = self.spawned
+        self.spawned += 1
+        self.count += 1
+        self.bounds = None
+        if self.count > self.high_water:
+            self.high_water = self.count
+
+    def owned(self, owner):
+        """Return the number of live projectiles fired by an owner.
+
+        Args:
+            owner (int): PLAYER_SHOT or ENEMY_SHOT.
+        """
+        return int(np.count_nonzero(self.owner[:self.count] == owner))
+
+    def clear(self):
+        """Remove every projectile."""
+        self.count = 0
+        self.bounds = None
+
+    def get_state(self):
+        """Return copies of the live projectiles' arrays and the serial counter."""
+        n = self.count
+        state = {name: getattr(self, name)[:n].copy()
+                 for name in ('x', 'y', 'vx', 'vy', 'bucket', 'owner', 'serial')}
+        state['spawned'] = self.spawned
+        return state
+
+    def set_state(self, state):
+        """Replace every projectile with those of a ``get_state`` result."""
+        n = len(state['x'])
+        while len(self.x) < n:
+            self._grow()
+        for name in ('x', 'y', 'vx', 'vy', 'bucket', 'owner', 'serial'):
+            getattr(self, name)[:n] = state[name]
+        self.count = n
+        self.spawned = int(state['spawned'])
+        self.bounds = None
+        self.high_water = max(self.high_water, n)
+
+    def _frame_index(self):
+        """Return the index into ``frames`` of every live projectile."""
+        n = self.count
+        return self.owner[:n] * self.steps + self.bucket[:n]
+
+    def _corners(self, x, y, frame):
+        """Return rect left/top edges the way ``Rect.center`` places float centers."""
+        # Rect rounds a float center half away from zero
+        left = np.trunc(x + np.copysign(0.5, x)).astype(np.int32) - self.half_width[frame]
+        top = np.trunc(y + np.copysign(0.5, y)).astype(np.int32) - self.half_height[frame]
+        return left, top
+
+    def _compact(self, keep):
+        """Drop projectiles whose ``keep`` flag is False, preserving order."""
+        n = self.count
+        kept = int(np.count_nonzero(keep))
+        if kept == n:
+            return
+        for array in (self.x, self.y, self.vx, self.vy, self.bucket, self.owner, self.serial):
+            array[:kept] = array[:n][keep]
+        self.count = kept
+        if self.bounds is not None:
+            self.bounds = tuple(array[keep] for array in self.bounds)
+
+    def update(self, delta_time):
+        """Move every projectile and drop those that left the screen."""
+        n = self.count
+        self.last_delta_time = delta_time
+        if not n:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        x += self.vx[:n] * delta_time
+        y += self.vy[:n] * delta_time
+        frame = self._frame_index()
+        left, top = self._corners(x, y, frame)
+        # Collision tests later in the tick reuse the rects
+        self.bounds = (frame, left, top)
+        self._compact((left + self.widths[frame] >= 0) & (left <= WIDTH) &
+                      (top + self.heights[frame] >= 0) & (top <= HEIGHT))
+
+    def collide(self, sprites, owner, narrow_phase=None):
+        """Collision of one owner's projectiles with sprites.
+
+        Sprites are tested in order, and a projectile is used up by the first
+        sprite it hits, like ``pygame.sprite.groupcollide`` with both kill flags.
+        Rects are compared for every pair at once; pairs that overlap go
+        through the circle and mask tiers like ``NarrowPhase`` pairs.
+
+        Args:
+            sprites (list): Sprites with ``rect``, ``radius``, ``mask`` and
+                ``precision`` to test.
+            owner (int): Only projectiles of this owner are tested.
+            narrow_phase (NarrowPhase): Precision cap and counters to use.
+
+        Returns:
+            list: Sprites hit by at least one projectile.
+        """
+        n = self.count
+        if not n or not sprites:
+            return []
+        ours = self.owner[:n] == owner
+        if not ours.any():
             return []
-    except Exception as e:
-        print(f"Error loading ranking: {e}")
-        return []
+        if narrow_phase is None:
+            narrow_phase = NarrowPhase()
+        counters = narrow_phase.counters
+        radius = self.radii[owner]
+        if self.bounds is None:
+            frame = self._frame_index()
+            self.bounds = (frame, *self._corners(self.x[:n], self.y[:n], frame))
+        frame, left, top = self.bounds
+        right = left + self.widths[frame]
+        bottom = top + self.heights[frame]
+        rects = np.array([sprite.rect for sprite in sprites]).reshape(-1, 4)
+        s_left = rects[:, 0:1]
+        s_top = rects[:, 1:2]
+        # Broad phase: projectile rects overlapping each sprite rect
+        overlap = (ours & (left < s_left + rects[:, 2:3]) & (right > s_left) &
+                   (top < s_top + rects[:, 3:4]) & (bottom > s_top))
+        candidates = np.nonzero(overlap)
+        pairs = int(np.count_nonzero(ours)) * len(sprites)
+        counters['pairs'] += pairs
+        counters['rect'] += pairs - len(candidates[0])
+        hit_sprites = []
+        used = np.zeros(n, dtype=bool)
+        x = self.x
+        y = self.y
+        for i, j in zip(*candidates):
+            if used[j]:
+                continue
+            sprite = sprites[i]
+            precision = min(sprite.precision, self.precision, narrow_phase.max_precision)
+            if precision >= COLLIDE_CIRCLE:
+                dx = x[j] - sprite.rect.centerx
+                dy = y[j] - sprite.rect.centery
+                reach = radius + sprite.radius
+                if dx * dx + dy * dy > reach * reach:
+                    counters['circle'] += 1
+                    continue
+                offset = (int(left[j]) - sprite.rect.left, int(top[j]) - sprite.rect.top)
+                if precision == COLLIDE_MASK and not sprite.mask.overlap(self.frames[frame[j]][1], offset):
+                    counters['mask'] += 1
+                    continue
+            counters['hits'] += 1
+            used[j] = True
+            if not hit_sprites or hit_sprites[-1] is not sprite:
+                hit_sprites.append(sprite)
+        if used.any():
+            self._compact(~used)
+        return hit_sprites
+
+    def draw(self, surface, alpha=1.0, offset=(0, 0), scale=1):
+        """Blit every projectile in one batch.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            alpha (float): Fraction of a tick elapsed since the last update.
+            offset (tuple): Camera offset in pixels.
+            scale (float): Surface pixels per game pixel.
+
+        Returns:
+            list: Rects of the drawn projectiles.
+        """
+        n = self.count
+        if not n:
+            self.drawn_rects = []
+            return []
+        lag = (1 - alpha) * self.last_delta_time
+        frame = self._frame_index()
+        left, top = self._corners(self.x[:n] - self.vx[:n] * lag,
+                                  self.y[:n] - self.vy[:n] * lag, frame)
+        surfaces = self.surfaces
+        if scale != 1:
+            surfaces = [assets.scaled(image, scale) for image in surfaces]
+            left = ((left + offset[0]) * scale).astype(np.int32)
+            top = ((top + offset[1]) * scale).astype(np.int32)
+            offset = (0, 0)
+        self.drawn_rects = surface.blits(
+            zip([surfaces[i] for i in frame.tolist()],
+                zip((left + offset[0]).tolist(), (top + offset[1]).tolist())))
+        return self.drawn_rects
+
+    def stats(self):
+        """Return the projectile counters.
+
+        Returns:
+            dict: Live projectiles, array capacity and high-water mark.
+        """
+        return {'live': self.count, 'capacity': len(self.x), 'high_water': self.high_water}
+
+class ParticleSystem:
+    """Short-lived visual particles, stored as parallel NumPy arrays.
+
+    Bursts are emitted, moved and expired in bulk, and drawn with one
+    ``Surface.blits`` call from a shared sprite sheet whose frames shrink and
+    cool with age. Particles never affect gameplay and draw from their own
+    random generator, so emitting them leaves the game's RNG untouched.
+
+    The capacity is a hard cap. Above half of it bursts are thinned in
+    proportion to the space left, so a flood of explosions fades out
+    instead of cutting off, and ``density`` scales every burst.
+    """
+
+    def __init__(self, capacity=MAX_PARTICLES, seed=None):
+        """Initialize an empty system.
+
+        Args:
+            capacity (int): Most particles alive at once.
+            seed (int): Seed of the particle random generator.
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.age = np.zeros(capacity)
+        self.life = np.ones(capacity)
+        self.rng = np.random.default_rng(seed)
+        self.density = 1.0
+        self.emitted = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.drawn_rects = []
+
+        # One sheet frame per age stage: a disc shrinking from white-hot to dark red
+        stages = len(PARTICLE_COLORS)
+        size = 2 * PARTICLE_RADIUS + 1
+        self.sheet = pygame.Surface((size * stages, size), pygame.SRCALPHA)
+        self.areas = []
+        for i, color in enumerate(PARTICLE_COLORS):
+            radius = max(1, round(PARTICLE_RADIUS * (stages - i) / stages))
+            center = (i * size + PARTICLE_RADIUS, PARTICLE_RADIUS)
+            pygame.draw.circle(self.sheet, color, center, radius)
+            self.areas.append(pygame.Rect(center[0] - radius, center[1] - radius,
+                                          2 * radius, 2 * radius))
+        self.half_size = np.array([area.width // 2 for area in self.areas])
+
+    def __len__(self):
+        return self.count
+
+    def burst(self, position, count, speed=PARTICLE_SPEED, life=PARTICLE_LIFE):
+        """Emit particles flying out of a point in random directions.
+
+        Args:
+            position (tuple): Center of the burst.
+            count (int): Particles requested.
+            speed (float): Fastest particle speed in pixels per second.
+            life (float): Longest particle lifetime in seconds.
+
+        Returns:
+            int: Particles actually emitted.
+        """
+        wanted = int(count * self.density)
+        soft_cap = self.capacity // 2
+        if self.count + wanted > soft_cap:
+            room = (self.capacity - self.count) / (self.capacity - soft_cap)
+            wanted = int(wanted * min(1, room))
+        wanted = max(0, min(wanted, self.capacity - self.count))
+        self.dropped += count - wanted
+        if not wanted:
+            return 0
+        start = self.count
+        end = start + wanted
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, wanted)
+        velocity = speed * np.sqrt(rng.random(wanted))  # Uniform over the disc
+        self.x[start:end] = position[0]
+        self.y[start:end] = position[1]
+        self.vx[start:end] = velocity * np.cos(angle)
+        self.vy[start:end] = velocity * np.sin(angle)
+        self.age[start:end] = 0
+        self.life[start:end] = life * rng.uniform(0.4, 1, wanted)
+        self.count = end
+        self.emitted += wanted
+        if end > self.high_water:
+            self.high_water = end
+        return wanted
+
+    def clear(self):
+        """Remove every particle."""
+        self.count = 0
+
+    def update(self, delta_time):
+        """Move and age every particle and drop the expired ones."""
+        n = self.count
+        if not n:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        x += vx * delta_time
+        y += vy * delta_time
+        drag = PARTICLE_DRAG ** (delta_time * 60)
+        vx *= drag
+        vy *= drag
+        age = self.age[:n]
+        age += delta_time
+        keep = age < self.life[:n]
+        kept = int(np.count_nonzero(keep))
+        if kept < n:
+            for array in (self.x, self.y, self.vx, self.vy, self.age, self.life):
+                array[:kept] = array[:n][keep]
+            self.count = kept
+
+    def draw(self, surface, offset=(0, 0), scale=1):
+        """Blit every particle from the sheet in one batch.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            offset (tuple): Camera offset in pixels.
+            scale (float): Surface pixels per game pixel. Positions are
+                scaled; the particles keep their size.
+
+        Returns:
+            list: One rect bounding every drawn particle, or none.
+        """
+        n = self.count
+        if not n:
+            self.drawn_rects = []
+            return []
+        stage = np.minimum((self.age[:n] / self.life[:n] * len(self.areas)).astype(np.int32),
+                           len(self.areas) - 1)
+        half = self.half_size[stage]
+        x = self.x[:n] + offset[0]
+        y = self.y[:n] + offset[1]
+        if scale != 1:
+            x *= scale
+            y *= scale
+        left = x.astype(np.int32) - half
+        top = y.astype(np.int32) - half
+        # Lazy zips let blits consume the batch without building a list of tuples
+        surface.blits(zip(itertools.repeat(self.sheet), zip(left.tolist(), top.tolist()),
+                          map(self.areas.__getitem__, stage.tolist())), False)
+        size = 2 * PARTICLE_RADIUS + 1
+        x0 = int(left.min())
+        y0 = int(top.min())
+        self.drawn_rects = [pygame.Rect(x0, y0, int(left.max()) + size - x0,
+                                        int(top.max()) + size - y0)]
+        return self.drawn_rects
+
+    def stats(self):
+        """Return the particle counters.
+
+        Returns:
+            dict: Live particles, capacity, high-water mark, and particles
+            emitted and dropped by the caps and density.
+        """
+        return {'live': self.count, 'capacity': self.capacity, 'high_water': self.high_water,
+                'emitted': self.emitted, 'dropped': self.dropped, 'density': self.density}
+
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite that returns itself to its SpritePool when killed."""
+
+    pool = None
+
+    def kill(self):
+        """Remove the sprite from all groups and hand it back to its pool."""
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed on font, string, antialias and color."""
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        """Initialize an empty cache.
+
+        Args:
+            max_entries (int): Number of surfaces kept before the least recently
+                used one is evicted.
+        """
+        self.max_entries = max_entries
+        self.surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        """Return ``font.render(text, antialias, color)``, rendering it only once.
+
+        Args:
+            font (pygame.font.Font): Font to render with.
+            text (str): Text to render.
+            antialias (bool): Whether to antialias the glyphs.
+            color (tuple): Text color.
+
+        Returns:
+            pygame.Surface: Shared surface; callers must not draw on it.
+        """
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def stats(self):
+        """Return the cache counters.
+
+        Returns:
+            dict: Number of cached surfaces, hits and misses.
+        """
+        return {'surfaces': len(self.surfaces), 'hits': self.hits, 'misses': self.misses}
+
+text_cache = TextCache()
+
+def draw_text(surface, font, text, color, x, y):
+    """Draw a line of text placed in WIDTH x HEIGHT coordinates.
+
+    The surface may be any multiple of WIDTH x HEIGHT; the text is rendered
+    at that scale rather than resized, so it stays sharp.
+
+    Args:
+        surface (pygame.Surface): Surface to draw on.
+        font (str): Font name, a key of FONT_SIZES.
+        text (str): Text to draw.
+        color (tuple): Text color.
+        x (float): Left edge of the text, or None to center it.
+        y (float): Top edge of the text.
+
+    Returns:
+        pygame.Rect: Area covered by the text.
+    """
+    scale = surface.get_width() / WIDTH
+    image = text_cache.render(get_font(font, scale), text, True, color)
+    left = (surface.get_width() - image.get_width()) / 2 if x is None else x * scale
+    return surface.blit(image, (left, y * scale))
+
+class GlyphAtlas:
+    """Per-character surfaces of one font and color, composed into strings.
+
+    Counters whose digits change often are built from glyphs rendered once,
+    so a new value never rasterizes text.
+    """
+
+    def __init__(self, font, color, antialias=True):
+        """Initialize an empty atlas.
+
+        Args:
+            font (pygame.font.Font): Font to render glyphs with.
+            color (tuple): Glyph color.
+            antialias (bool): Whether to antialias the glyphs.
+        """
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.glyphs = {}
+
+    def render(self, text):
+        """Compose a string from cached glyphs.
+
+        Args:
+            text (str): Text to compose.
+
+        Returns:
+            pygame.Surface: New surface with the composed text.
+        """
+        glyphs = []
+        for char in text:
+            glyph = self.glyphs.get(char)
+            if glyph is None:
+                glyph = self.font.render(char, self.antialias, self.color)
+                self.glyphs[char] = glyph
+            glyphs.append(glyph)
+        width = sum(glyph.get_width() for glyph in glyphs)
+        surface = pygame.Surface((max(width, 1), self.font.get_height()), pygame.SRCALPHA)
+        x = 0
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return surface
+
+class HudText:
+    """HUD line bound to a value that is re-rendered only when the value changes."""
+
+    def __init__(self, template, atlas):
+        """Initialize the widget.
+
+        Args:
+            template (str): Format string with one ``{}`` field for the value.
+            atlas (GlyphAtlas): Glyphs used to compose the line.
+        """
+        self.template = template
+        self.atlas = atlas
+        self.value = None
+        self.surface = None
+
+    def render(self, value):
+        """Return the line for a value, composing it only if the value changed.
+
+        Args:
+            value: Value shown in the template.
+
+        Returns:
+            pygame.Surface: The rendered line.
+        """
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.atlas.render(self.template.format(value))
+        return self.surface
+
+def percentiles(samples):
+    """Return p50/p95/p99, mean and max of a list of samples, such as frame times."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'mean': sum(ordered) / len(ordered),
+        'max': ordered[-1],
+    }
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a ring buffer of recent frames.
+
+    Phases are timed as laps: each call to ``lap`` charges the time since
+    the previous lap to the named phase, so back-to-back phases need one
+    clock read each. While disabled every call returns immediately.
+    """
+
+    def __init__(self, max_frames=PROFILE_FRAMES):
+        """Initialize the profiler.
+
+        Args:
+            max_frames (int): Number of recent frames kept.
+        """
+        self.enabled = False
+        self.overlay = False
+        self.frames = collections.deque(maxlen=max_frames)
+        self.frame_number = 0
+        self.phases = {}
+        self.frame_start = 0
+        self.last_lap = 0
+        self.atlas = None
+
+    def toggle_overlay(self):
+        """Show or hide the on-screen graph, recording while it is shown."""
+        self.overlay = not self.overlay
+        if self.overlay and not self.enabled:
+            self.enabled = True
+            self.begin_frame()
+
+    def begin_frame(self):
+        """Start timing a frame."""
+        if not self.enabled:
+            return
+        self.phases = {}
+        self.frame_start = self.last_lap = time.perf_counter()
+
+    def lap(self, name):
+        """Charge the time since the previous lap to a phase.
+
+        Args:
+            name (str): Phase name. Repeated laps of a phase within a frame,
+                such as one per simulation tick, add up.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0) + (now - self.last_lap) * 1000
+        self.last_lap = now
+
+    def end_frame(self, counts=None):
+        """Store the finished frame in the ring buffer.
+
+        Args:
+            counts (dict): Sprite counts per group at the end of the frame.
+        """
+        if not self.enabled:
+            return
+        self.frame_number += 1
+        self.frames.append({
+            'frame': self.frame_number,
+            'total': (time.perf_counter() - self.frame_start) * 1000,
+            'phases': self.phases,
+            'counts': counts or {},
+        })
+
+    def summary(self):
+        """Return the mean milliseconds per phase over the buffered frames."""
+        totals = collections.Counter()
+        for frame in self.frames:
+            totals.update(frame['phases'])
+            totals['total'] += frame['total']
+        return {name: value / len(self.frames) for name, value in totals.items()}
+
+    def draw_overlay(self, surface, position=(10, HEIGHT - PROFILE_GRAPH_HEIGHT - 40)):
+        """Draw a graph of recent frame times with the latest phase breakdown.
+
+        Bars are scaled so the top of the graph is two 60 fps frame budgets;
+        the line marks one budget.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            position (tuple): Top-left corner of the overlay.
+
+        Returns:
+            pygame.Rect: The area covered by the overlay.
+        """
+        if self.atlas is None:
+            self.atlas = GlyphAtlas(pygame.font.Font(None, 20), YELLOW)
+        width = PROFILE_GRAPH_WIDTH
+        height = PROFILE_GRAPH_HEIGHT
+        area = pygame.Rect(position, (width, height + 40))
+        surface.fill((20, 20, 40), area)
+        budget = 1000 / 60
+        bottom = area.top + height
+        frames = list(self.frames)[-width // 2:]
+        for i, frame in enumerate(frames):
+            bar = min(height, int(frame['total'] / (2 * budget) * height))
+            color = RED if frame['total'] > budget else WHITE
+            x = area.left + i * 2
+            pygame.draw.line(surface, color, (x, bottom - 1), (x, bottom - bar))
+        pygame.draw.line(surface, GRAY, (area.left, bottom - height // 2),
+                         (area.right - 1, bottom - height // 2))
+        if frames:
+            latest = frames[-1]
+            phases = sorted(latest['phases'].items(), key=lambda item: -item[1])[:3]
+            lines = [f"{latest['total']:.1f} ms  {len(self.frames)} frames",
+                     "  ".join(f"{name} {value:.1f}" for name, value in phases)]
+            for i, line in enumerate(lines):
+                surface.blit(self.atlas.render(line), (area.left + 4, bottom + 2 + i * 18))
+        return area
+
+    def dump(self, path):
+        """Write the buffered frames to a trace file.
+
+        Args:
+            path (str): Output file; a '.csv' suffix writes one row per frame
+                with a column per phase and group, anything else writes JSON.
+        """
+        frames = list(self.frames)
+        if not path.endswith('.csv'):
+            with open(path, 'w') as file:
+                json.dump(frames, file, indent=1)
+            return
+        phases = sorted({name for frame in frames for name in frame['phases']})
+        groups = sorted({name for frame in frames for name in frame['counts']})
+        with open(path, 'w') as file:
+            file.write(','.join(['frame', 'total'] + phases + groups) + '\n')
+            for frame in frames:
+                row = [str(frame['frame']), f"{frame['total']:.4f}"]
+                row += [f"{frame['phases'].get(name, 0):.4f}" for name in phases]
+                row += [str(frame['counts'].get(name, 0)) for name in groups]
+                file.write(','.join(row) + '\n')
+
+class LoadGovernor:
+    """Adaptive effect quality driven by a rolling window of frame times.
+
+    The governor only trades visual detail: particle density, star count,
+    screen shake and explosion animations. Gameplay limits depend on the
+    simulation alone and are reported through ``note`` so that every
+    decision shows up in the same log.
+    """
+
+    def __init__(self, budget_ms=1000 / MAX_FPS, verbose=False):
+        """Initialize the governor at full quality.
+
+        Args:
+            budget_ms (float): Milliseconds of work allowed per frame.
+            verbose (bool): Also print each decision to stderr.
+        """
+        self.budget_ms = budget_ms
+        self.verbose = verbose
+        self.level = 0
+        self.window = collections.deque(maxlen=GOVERNOR_WINDOW)
+        self.cooldown = 0
+        self.frame_number = 0
+        self.limits = {}
+        self.log = collections.deque(maxlen=GOVERNOR_LOG_SIZE)
+
+    @property
+    def settings(self):
+        """dict: The effect settings of the current quality level."""
+        return QUALITY_LEVELS[self.level]
+
+    def _record(self, message):
+        """Append a decision to the log, dropping the oldest once it is full."""
+        self.log.append({'frame': self.frame_number, 'level': self.level, 'message': message})
+        if self.verbose:
+            print(f"governor: frame {self.frame_number}: {message}", file=sys.stderr)
+
+    def observe(self, frame_ms):
+        """Record the work time of a frame and adjust the quality level.
+
+        Args:
+            frame_ms (float): Milliseconds spent updating and drawing the frame.
+
+        Returns:
+            bool: Whether the quality level changed.
+        """
+        self.frame_number += 1
+        self.window.append(frame_ms)
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+        if len(self.window) < GOVERNOR_WINDOW:
+            return False
+        mean = sum(self.window) / len(self.window)
+        if mean > self.budget_ms * GOVERNOR_HIGH and self.level < len(QUALITY_LEVELS) - 1:
+            self.level += 1
+            reason = "over"
+        elif mean < self.budget_ms * GOVERNOR_LOW and self.level > 0:
+            self.level -= 1
+            reason = "under"
+        else:
+            return False
+        self.window.clear()
+        self.cooldown = GOVERNOR_COOLDOWN
+        self._record(f"quality {self.level}: mean frame {mean:.2f} ms {reason} "
+                     f"{self.budget_ms:.2f} ms budget")
+        return True
+
+    def note(self, key, active, message):
+        """Log a gameplay limit when it starts or stops applying.
+
+        Args:
+            key (str): Name of the limit.
+            active (bool): Whether the limit applies this tick.
+            message (str): Description logged when it starts applying.
+        """
+        if self.limits.get(key, False) == active:
+            return
+        self.limits[key] = active
+        self._record(message if active else f"{key} released")
+
+    def reset(self):
+        """Forget gameplay limit state for a new game, keeping the quality level."""
+        self.limits = {}
+
+class KeyState:
+    """Snapshot of held keys that can be indexed like ``pygame.key.get_pressed()``."""
+
+    def __init__(self, keys=()):
+        """Initialize the snapshot.
+
+        Args:
+            keys (iterable): Pygame key constants that are held down.
+        """
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+def frame_view(surface):
+    """Return the pixels of a surface as an array without copying them.
+
+    The array locks the surface, so delete it before drawing on the surface
+    again.
+
+    Args:
+        surface (pygame.Surface): A 24 or 32 bit surface, such as SCREEN.
+
+    Returns:
+        np.ndarray: (height, width, 3) RGB view of the surface.
+    """
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+
+def reduce_frames(frames, scale=1, gray=False, out=None):
+    """Downscale and grayscale frames in one vectorized pass.
+
+    Args:
+        frames (np.ndarray): (..., height, width, 3) RGB frames; any leading
+            axes are treated as a batch.
+        scale (int): Integer downscale factor. Each output pixel averages a
+            ``scale`` x ``scale`` block; edges that do not fill a block are cropped.
+        gray (bool): Convert to luma with GRAY_WEIGHTS.
+        out (np.ndarray): Optional uint8 array to write the result into.
+
+    Returns:
+        np.ndarray: uint8 frames of shape (..., height // scale, width // scale),
+        with a trailing RGB axis unless ``gray`` is set.
+    """
+    batch = frames.shape[:-3]
+    height = frames.shape[-3] // scale
+    width = frames.shape[-2] // scale
+    pixels = frames[..., :height * scale, :width * scale, :]
+    if scale > 1:
+        # Integer sums keep the result independent of the input's memory layout
+        pixels = pixels.reshape(*batch, height, scale, width, scale, 3).sum(
+            axis=(-4, -2), dtype=np.uint32) * np.float32(1 / scale ** 2)
+    if gray:
+        pixels = pixels @ GRAY_WEIGHTS
+    shape = batch + (height, width) + (() if gray else (3,))
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    if pixels.dtype == np.uint8:
+        np.copyto(out, pixels)
+    else:
+        np.copyto(out, pixels + 0.5, casting='unsafe')
+    return out
+
+class FrameStream:
+    """Streams rendered frames to a file or pipe as raw video.
+
+    The game loop only copies the surface's bytes into a free buffer, one
+    memcpy per frame. Channel reordering, reduction and writing happen on a
+    background thread. When every buffer is still waiting for the writer the
+    frame is dropped instead of stalling the loop.
+
+    The output is headerless ``rgb24`` (or ``gray`` with ``gray=True``)
+    frames, for example for ``ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -i -``.
+    """
+
+    def __init__(self, target, scale=1, gray=False, buffers=CAPTURE_BUFFERS):
+        """Open the output and start the writer thread.
+
+        Args:
+            target: File path, '-' for standard output, or a binary file object.
+            scale (int): Integer downscale factor, as in ``reduce_frames``.
+            gray (bool): Write grayscale frames.
+            buffers (int): Frames that may wait for the writer before frames are dropped.
+        """
+        if target == '-':
+            self.file = sys.stdout.buffer
+            self.owns_file = False
+            # Anything printed from now on would land in the middle of the video
+            sys.stdout = sys.stderr
+        elif isinstance(target, str):
+            self.file = open(target, 'wb')
+            self.owns_file = True
+        else:
+            self.file = target
+            self.owns_file = False
+        self.scale = scale
+        self.gray = gray
+        self.buffers = buffers
+        self.free = queue.Queue()
+        self.pending = queue.Queue()
+        self.layout = None
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.copy_time = 0
+        self.error = None
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _prepare(self, surface):
+        """Allocate the frame buffers and find the RGB bytes of a pixel."""
+        bytesize = surface.get_bytesize()
+        width, height = surface.get_size()
+        shifts = surface.get_shifts()[:3]
+        if sys.byteorder == 'little':
+            channels = [shift // 8 for shift in shifts]
+        else:
+            channels = [bytesize - 1 - shift // 8 for shift in shifts]
+        self.layout = (surface.get_size(), bytesize, surface.get_pitch(), channels)
+        for _ in range(self.buffers):
+            self.free.put(np.empty((height, surface.get_pitch()), dtype=np.uint8))
+
+    def write(self, surface):
+        """Queue a copy of a surface's current contents.
+
+        Args:
+            surface (pygame.Surface): The frame, at the same size and format
+                as the first frame written.
+
+        Returns:
+            bool: Whether the frame was queued; False if it was dropped.
+        """
+        started = time.perf_counter()
+        if self.layout is None:
+            self._prepare(surface)
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        # The buffer protocol exposes the surface's bytes in place
+        view = surface.get_buffer()
+        np.copyto(buffer, np.frombuffer(view, dtype=np.uint8).reshape(buffer.shape))
+        del view  # Unlock the surface
+        self.pending.put(buffer)
+        self.frames += 1
+        self.copy_time += time.perf_counter() - started
+        return True
+
+    def _write_loop(self):
+        """Convert and write queued frames until ``close``."""
+        while True:
+            buffer = self.pending.get()
+            if buffer is None:
+                return
+            if self.error is None:
+                (width, height), bytesize, pitch, channels = self.layout
+                pixels = buffer[:, :width * bytesize].reshape(height, width, bytesize)
+                frame = reduce_frames(pixels[..., channels], self.scale, self.gray)
+                try:
+                    self.file.write(frame.data)
+                    self.bytes_written += frame.nbytes
+                except OSError as e:
+                    # A closed pipe stops the stream but never the game
+                    self.error = e
+                    print(f"Error writing frames: {e}", file=sys.stderr)
+            self.free.put(buffer)
+
+    def close(self):
+        """Write the remaining frames and close the output."""
+        self.pending.put(None)
+        self.writer.join()
+        try:
+            self.file.flush()
+            if self.owns_file:
+                self.file.close()
+        except OSError:
+            pass
+
+    def stats(self):
+        """Return the stream counters.
+
+        Returns:
+            dict: Frames queued and dropped, bytes written and the mean
+            milliseconds the game loop spent per queued frame.
+        """
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'bytes': self.bytes_written,
+            'copy_ms': self.copy_time / self.frames * 1000 if self.frames else 0,
+        }
+
+class ReplayRecorder:
+    """Streams a game's seed, difficulty and per-tick input to a binary file.
+
+    The file starts with a header (magic, version, seed, tick rate and
+    difficulty). Each tick's input is packed into one byte: the held arrow
+    keys, a count of SPACE presses and an ESC flag. Runs of identical bytes
+    are written as (byte, varint run length) pairs, so a tick costs one
+    comparison unless the input changed.
+    """
+
+    def __init__(self, path, seed, tick_rate, difficulty):
+        """Open the file and write the header.
+
+        Args:
+            path (str): Path of the replay file.
+            seed (int): Seed the game's RNG was reset with.
+            tick_rate (int): Simulation ticks per second.
+            difficulty (str): Difficulty the game is played at.
+        """
+        self.file = open(path, 'wb')
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, tick_rate,
+                                           DIFFICULTIES.index(difficulty)))
+        self.state = None
+        self.run = 0
+        self.ticks = 0
+
+    def record(self, held, pressed):
+        """Append one tick of input.
+
+        Args:
+            held (iterable): Key constants held down during the tick.
+            pressed (iterable): Key constants pressed this tick.
+        """
+        state = encode_input(held, pressed)
+        self.ticks += 1
+        if state == self.state:
+            self.run += 1
+            return
+        self._write_run()
+        self.state = state
+        self.run = 1
+
+    def _write_run(self):
+        """Write the pending run of identical input bytes."""
+        if not self.run:
+            return
+        data = bytearray((self.state,))
+        run = self.run
+        while run >= 0x80:
+            data.append(run & 0x7F | 0x80)
+            run >>= 7
+        data.append(run)
+        self.file.write(data)
+
+    def close(self):
+        """Write the last run and close the file."""
+        self._write_run()
+        self.run = 0
+        self.file.close()
+
+class Replay:
+    """A recorded game: its header and the input of every tick."""
+
+    def __init__(self, path):
+        """Read a replay file.
+
+        Args:
+            path (str): Path of the replay file.
+
+        Raises:
+            ValueError: If the file is not a replay this version can read.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < REPLAY_HEADER.size:
+            raise ValueError(f"{path} is too short to be a replay")
+        magic, version, self.seed, self.tick_rate, difficulty = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        self.difficulty = DIFFICULTIES[difficulty]
+        self.runs = []
+        pos = REPLAY_HEADER.size
+        while pos < len(data):
+            state = data[pos]
+            pos += 1
+            run = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                run |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            self.runs.append((state, run))
+        self.ticks = sum(run for state, run in self.runs)
+
+    def inputs(self):
+        """Yield the (held, pressed) keys of every tick in order."""
+        for state, run in self.runs:
+            held, pressed = decode_input(state)
+            for _ in range(run):
+                yield held, pressed
+
+def encode_input(held, pressed):
+    """Pack one tick of input into a byte.
+
+    Args:
+        held (iterable): Key constants held down during the tick.
+        pressed (iterable): Key constants pressed this tick.
+
+    Returns:
+        int: Bits 0-3 hold the arrow keys, bits 4-5 the number of SPACE
+        presses (at most 3) and bit 6 ESC.
+    """
+    state = 0
+    for bit, key in enumerate(REPLAY_HELD_KEYS):
+        if key in held:
+            state |= 1 << bit
+    shots = 0
+    for key in pressed:
+        if key == pygame.K_SPACE:
+            shots += 1
+        elif key == pygame.K_ESCAPE:
+            state |= 0x40
+    return state | min(shots, 3) << 4
+
+def decode_input(state):
+    """Unpack a byte written by ``encode_input``.
+
+    Returns:
+        tuple: (held keys, pressed keys).
+    """
+    held = tuple(key for bit, key in enumerate(REPLAY_HELD_KEYS) if state & 1 << bit)
+    pressed = (pygame.K_SPACE,) * (state >> 4 & 3)
+    if state & 0x40:
+        pressed += (pygame.K_ESCAPE,)
+    return held, pressed
+
+def play_replay(path, headless=True, speed=1.0):
+    """Re-simulate a recorded game.
+
+    Args:
+        path (str): Path of the replay file.
+        headless (bool): Simulate as fast as possible without drawing.
+        speed (float): Playback speed relative to real time when drawing.
+
+    Returns:
+        Game: The game in its final state.
+    """
+    replay = Replay(path)
+    game = Game(headless=headless, tick_rate=replay.tick_rate)
+    game.difficulty = replay.difficulty
+    game.reset(replay.seed)
+    for held, pressed in replay.inputs():
+        if not headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and
+                                                 event.key == pygame.K_ESCAPE):
+                    return game
+            game.clock.tick(replay.tick_rate * speed)
+        # Pausing does not change the simulation, so playback never pauses
+        game.step(held, tuple(key for key in pressed if key != pygame.K_ESCAPE))
+        if not headless:
+            game.draw()
+        if not game.playing:
+            break
+    return game
+
+class GameState:
+    """The simulation data of a game at one tick, without any surfaces.
+
+    Sprites are SPRITE_STATE rows and projectiles and stars are array
+    copies, so taking a state every tick is cheap. Particles are left out:
+    they never affect gameplay and restoring a state clears them.
+    """
+
+    def __init__(self, values, rng, sprites, projectiles, stars):
+        """Initialize the state.
+
+        Args:
+            values (dict): Game and player numbers: score, level, timers, lives.
+            rng (tuple): State of the game RNG from ``random.Random.getstate``.
+            sprites (np.ndarray): SPRITE_STATE rows in update order.
+            projectiles (dict): ``ProjectileSystem.get_state`` result.
+            stars (dict): ``StarryBackground.get_state`` result.
+        """
+        self.values = values
+        self.rng = rng
+        self.sprites = sprites
+        self.projectiles = projectiles
+        self.stars = stars
+
+    def save(self, path):
+        """Write the state to an ``.npz`` file.
+
+        Args:
+            path (str): Output file.
+        """
+        meta = {'values': self.values, 'rng': self.rng, 'stars_rng': self.stars['rng']}
+        arrays = {f'projectile_{name}': value for name, value in self.projectiles.items()}
+        arrays.update({f'star_{name}': value for name, value in self.stars.items()
+                       if name != 'rng'})
+        np.savez(path, meta=np.array(json.dumps(meta)), sprites=self.sprites, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read a state written by ``save``.
+
+        Args:
+            path (str): Input file.
+
+        Returns:
+            GameState: The loaded state.
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            projectiles = {name[len('projectile_'):]: data[name] for name in data.files
+                           if name.startswith('projectile_')}
+            stars = {name[len('star_'):]: data[name] for name in data.files
+                     if name.startswith('star_')}
+            sprites = data['sprites']
+        stars['rng'] = meta['stars_rng']
+        version, internal, gauss = meta['rng']
+        return cls(meta['values'], (version, tuple(internal), gauss), sprites, projectiles, stars)
 
 class Game:
     """Main game class to encapsulate the game logic and state."""
 
-    def __init__(self):
-        """Initialize the game."""
+    def __init__(self, rng=None, headless=HEADLESS, render_mode='dirty',
+                 tick_rate=TICK_RATE, max_fps=MAX_FPS, replay_dir=None, profile=False,
+                 capture=None, render_scale=1.0, window_size=None, scaler='smooth',
+                 fullscreen=False):
+        """Initialize the game.
+
+        Args:
+            rng (random.Random): Source of all gameplay randomness. Pass a seeded
+                instance to make a game reproducible.
+            headless (bool): Run without drawing, music or menus, at a fixed time step.
+            render_mode (str): 'dirty' to redraw and present only changed areas of
+                a persistent screen, or 'full' to compose and flip the whole frame.
+                Only used at native size; a scaled playfield is always composed
+                in full.
+            tick_rate (int): Simulation ticks per second.
+            max_fps (int): Cap on rendered frames per second.
+            replay_dir (str): Directory to record a replay of every game into,
+                or None to not record.
+            profile (bool): Record per-phase frame timings from the start,
+                rather than only once the overlay is toggled on.
+            capture (FrameStream): Stream every rendered frame of gameplay to
+                it, or None to not capture.
+            render_scale (float): Playfield resolution relative to WIDTH x HEIGHT,
+                such as 0.5 on weak hardware or 2 for a 4K window. Game
+                coordinates do not change.
+            window_size (tuple): Window size in pixels; defaults to WIDTH x HEIGHT,
+                or the screen size when fullscreen.
+            scaler (str): How the playfield is fitted to the window, one of SCALERS.
+            fullscreen (bool): Open a fullscreen window.
+        """
+        flags = 0
+        if not headless:
+            if scaler == 'sdl':
+                flags |= pygame.SCALED
+            if fullscreen:
+                flags |= pygame.FULLSCREEN
+                # SCALED stretches the 800x600 screen to the desktop itself and
+                # cannot open a zero-sized one
+                default_size = (WIDTH, HEIGHT) if scaler == 'sdl' else (0, 0)
+                window_size = window_size or default_size
+        init_display(headless, window_size, flags)
+        window = pygame.display.get_surface()
+        # Outside the plain 800x600 case, frames are drawn on a playfield
+        # canvas that is resized into the window once, with the HUD drawn
+        # on top at window resolution
+        self.render_scale = render_scale
+        self.scaled = window is not SCREEN or render_scale != 1
+        self.playfield = fit_rect(window.get_size())
+        self.output_scale = self.playfield.width / WIDTH
+        self.scaler = scaler
+        self.canvas = None
+        if self.scaled:
+            self.canvas = pygame.Surface((round(WIDTH * render_scale), round(HEIGHT * render_scale)))
+        self.rng = rng if rng is not None else random.Random()
+        self.headless = headless
+        self.tick_rate = tick_rate
+        self.tick_time = 1 / tick_rate
+        self.replay_dir = replay_dir
+        self.recorder = None
+        self.seed = None
+        self.max_fps = max_fps
+        self.previous_centers = {}
+        self.render_mode = render_mode
+        self.full_redraw = True
+        self.last_shake_offset = (0, 0)
+        self.hud_rects = []
+        self.render_stats = {'rects': 0, 'pixels': 0}
+        self.profiler = FrameProfiler()
+        self.profiler.enabled = profile
+        self.governor = LoadGovernor(1000 / max_fps, verbose=not headless)
+        self.capture = capture
+        self.narrow_phase = NarrowPhase()
+        self.huds = {}  # HUD lines per text scale, created on first draw
+        self.menu_layers = {}  # Composed menu screens by menu state
+        self.menu_shown = None  # State of the menu on screen
         self.clock = pygame.time.Clock()
         self.playing = True
         self.running = True
         self.score = 0
         self.level = 1
-        self.level_counter = 0
-        self.next_powerup_time = random.randint(500, 1000)
-        self.starry_background = StarryBackground(50)
+        self.level_counter = 0  # Seconds into the current level
+        self.next_powerup_time = self.rng.randint(500, 1000) / 60  # Seconds
+        self.starry_background = StarryBackground(50, self.rng)
         self.player_initials = ""
         self.difficulty = 'Normal'  # Default difficulty
 
@@ -83,71 +2456,266 @@ class Game:
         self.shake_timer = 0
         self.shake_intensity = 0
 
-        # Load sounds
-        # Ensure sound files are in the 'sounds' directory
-        self.shot_sound = pygame.mixer.Sound('sounds/shot.ogg')
-        self.explosion_sound = pygame.mixer.Sound('sounds/explosion.ogg')
-        self.powerup_sound = pygame.mixer.Sound('sounds/powerup.ogg')
-        self.life_loss_sound = pygame.mixer.Sound('sounds/life_loss.ogg')
-
-        # Set sound volumes
-        self.shot_sound.set_volume(0.5)
-        self.explosion_sound.set_volume(0.5)
-        self.powerup_sound.set_volume(0.5)
-        self.life_loss_sound.set_volume(0.5)
-
-        # Load background music
-        # Ensure the music file is in the 'music' directory
-        pygame.mixer.music.load('music/background.wav')
-        pygame.mixer.music.set_volume(0.5)
-        pygame.mixer.music.play(-1)  # Loop indefinitely
+        # Sounds and music load in the background; headless games stay silent
+        # Ensure sound files are in the 'sounds' directory and music in 'music'
+        self.sounds = SoundBank()
+        self.sounds.start(play_music=not self.headless)
+
+        # Decode all sprite images while the menu is up; the first game waits
+        # for them so no file I/O happens in the game loop
+        self.asset_loader = threading.Thread(target=self._preload_assets, daemon=True)
+        self.asset_loader.start()
+
+    def _preload_assets(self):
+        """Load every sprite image into the shared asset cache."""
+        assets.preload()
+        startup.mark('sprites')
 
     def new(self):
         """Start a new game."""
-        self.all_sprites = pygame.sprite.Group()
+        self.reset()
+        if self.replay_dir is not None:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.seed}.replay"
+            self.recorder = ReplayRecorder(os.path.join(self.replay_dir, name),
+                                           self.seed, self.tick_rate, self.difficulty)
+        try:
+            self.run()
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+
+    def reset(self, seed=None):
+        """Set up the state for a new game without entering the game loop.
+
+        Args:
+            seed (int): Seed for the game's RNG. By default a new seed is drawn
+                from the RNG, so a seeded Game still plays reproducibly.
+        """
+        self.seed = seed if seed is not None else self.rng.getrandbits(32)
+        self.rng.seed(self.seed)
+        self.asset_loader.join()
+        self.all_sprites = pygame.sprite.RenderUpdates()
         self.enemies = pygame.sprite.Group()
-        self.projectiles = pygame.sprite.Group()
-        self.enemy_projectiles = pygame.sprite.Group()
+        self.projectiles = ProjectileSystem()
+        self.particles = ParticleSystem(seed=self.seed)
         self.powerups = pygame.sprite.Group()
         self.explosions = pygame.sprite.Group()
         self.score = 0
         self.level = 1
-        self.level_counter = 0
-        self.next_powerup_time = random.randint(500, 1000)
+        self.level_counter = 0  # Seconds into the current level
+        self.next_powerup_time = self.rng.randint(500, 1000) / 60  # Seconds
+        self.explosion_pool = SpritePool(Explosion)
+        self.enemy_grid = SpatialHash()
+        self.powerup_grid = SpatialHash()
         self.player = Player()
         self.all_sprites.add(self.player)
-        self.starry_background = StarryBackground(50)
-        self.run()
+        self.starry_background = StarryBackground(50, self.rng)
+        self.governor.reset()
+        self.apply_quality()
+        self.playing = True
+
+    def apply_quality(self):
+        """Apply the governor's effect settings to the particles and stars."""
+        settings = self.governor.settings
+        self.particles.density = settings['particles']
+        background = self.starry_background
+        background.visible = round(background.x.shape[1] * settings['stars'])
+        self.full_redraw = True
+
+    def snapshot(self):
+        """Capture the simulation state, for rollback, checkpoints and quick-saves.
+
+        Returns:
+            GameState: A state that ``restore`` can return this game to.
+        """
+        player = self.player
+        values = {
+            'seed': self.seed, 'difficulty': self.difficulty, 'score': self.score,
+            'level': self.level, 'level_counter': self.level_counter,
+            'next_powerup_time': self.next_powerup_time, 'shake_timer': self.shake_timer,
+            'shake_intensity': self.shake_intensity, 'playing': self.playing,
+            'lives': player.lives, 'weapon_level': player.weapon_level, 'shield': player.shield,
+        }
+        sprites = np.array([sprite.get_state() for sprite in self.all_sprites], SPRITE_STATE)
+        return GameState(values, self.rng.getstate(), sprites, self.projectiles.get_state(),
+                         self.starry_background.get_state())
+
+    def restore(self, state):
+        """Return the game to a captured state.
+
+        Sprites are rebuilt from their rows without running their constructors,
+        so the game RNG is left exactly as captured. The player object is kept.
+
+        Args:
+            state (GameState): Result of ``snapshot``.
+        """
+        for explosion in self.explosions.sprites():
+            explosion.kill()  # Back to the pool
+        self.all_sprites.empty()
+        self.enemies.empty()
+        self.powerups.empty()
+        all_sprites = (self.all_sprites,)
+        enemies = (self.all_sprites, self.enemies)
+        powerups = (self.all_sprites, self.powerups)
+        explosions = (self.all_sprites, self.explosions)
+        for row in state.sprites.tolist():
+            kind = row[0]
+            if kind == STATE_PLAYER:
+                self.player.set_state(row)
+                self.player.add(*all_sprites)
+            elif kind == STATE_ENEMY:
+                Enemy.from_state(self, row).add(*enemies)
+            elif kind == STATE_SHOOTER:
+                ShooterEnemy.from_state(self, row).add(*enemies)
+            elif kind == STATE_POWERUP:
+                PowerUp.from_state(self, row).add(*powerups)
+            elif kind == STATE_EXPLOSION:
+                self.explosion_pool.acquire(explosions, (row[1], row[2])).set_state(row)
+
+        values = state.values
+        self.seed = values['seed']
+        self.difficulty = values['difficulty']
+        self.score = values['score']
+        self.level = values['level']
+        self.level_counter = values['level_counter']
+        self.next_powerup_time = values['next_powerup_time']
+        self.shake_timer = values['shake_timer']
+        self.shake_intensity = values['shake_intensity']
+        self.playing = values['playing']
+        self.player.lives = values['lives']
+        self.player.weapon_level = values['weapon_level']
+        self.player.shield = values['shield']
+        self.rng.setstate(state.rng)
+        self.projectiles.set_state(state.projectiles)
+        self.particles.clear()
+        self.starry_background.set_state(state.stars)
+        self.enemy_grid = SpatialHash()
+        self.powerup_grid = SpatialHash()
+        self.previous_centers = {}
+        self.governor.reset()
+        self.full_redraw = True
 
     def run(self):
-        """Main game loop."""
+        """Main game loop.
+
+        The simulation advances in fixed ticks of ``tick_time`` seconds, as
+        many as the elapsed wall time calls for, and each rendered frame
+        interpolates sprites between the last two ticks.
+        """
         self.playing = True
+        if self.headless:
+            while self.playing:
+                self.step((), self.events())
+            return
+
+        accumulator = 0
+        pressed = []
+        self.clock.tick()
+        profiler = self.profiler
         while self.playing:
-            delta_time = self.clock.tick(60) / 1000  # Convert milliseconds to seconds
-            self.events()
-            self.update(delta_time)
-            self.draw()
+            frame_time = self.clock.tick(self.max_fps) / 1000  # Convert milliseconds to seconds
+            work_started = time.perf_counter()
+            profiler.begin_frame()
+            accumulator += min(frame_time, MAX_FRAME_TIME)
+            # Key presses wait for the next tick; held keys are sampled once per frame
+            pressed += self.events()
+            keys = pygame.key.get_pressed()
+            held = [key for key in REPLAY_HELD_KEYS if keys[key]]
+            profiler.lap('events')
+            while self.playing and accumulator >= self.tick_time:
+                self.step(held, pressed)
+                pressed = []
+                accumulator -= self.tick_time
+            self.draw(accumulator / self.tick_time)
+            if profiler.enabled:
+                profiler.end_frame(self.sprite_counts())
+            # Time spent waiting in clock.tick is idle, not load
+            if self.governor.observe((time.perf_counter() - work_started) * 1000):
+                self.apply_quality()
         self.game_over()
 
+    def sprite_counts(self):
+        """Return the number of live objects in each group."""
+        return {
+            'all_sprites': len(self.all_sprites),
+            'enemies': len(self.enemies),
+            'projectiles': len(self.projectiles),
+            'powerups': len(self.powerups),
+            'explosions': len(self.explosions),
+            'particles': len(self.particles),
+        }
+
+    def step(self, held=(), pressed=(), delta_time=None):
+        """Advance the simulation by one tick using scripted input.
+
+        Args:
+            held (iterable): Key constants held down during the tick, as polled
+                by the player (arrow keys).
+            pressed (iterable): Key constants pressed this tick, as delivered
+                by KEYDOWN events (SPACE to shoot, ESC to pause).
+            delta_time (float): Length of the tick in seconds; defaults to one
+                simulation tick.
+
+        Returns:
+            bool: Whether the game is still being played.
+        """
+        if delta_time is None:
+            delta_time = self.tick_time
+        if self.recorder is not None:
+            self.recorder.record(held, pressed)
+        self.sounds.begin_frame()
+        self.player.keys = KeyState(held)
+        for key in pressed:
+            if key == pygame.K_SPACE:
+                self.player.shoot(self)
+            elif key == pygame.K_ESCAPE and not self.headless:
+                self.pause_menu()
+        self.profiler.lap('input')
+        self.update(delta_time)
+        return self.playing
+
     def events(self):
-        """Handle game events."""
+        """Handle window events.
+
+        Returns:
+            list: Keys pressed since the last call that the game reacts to
+            (SPACE to shoot, ESC to pause).
+        """
+        pressed = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.playing = False
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    self.player.shoot(self)
-                elif event.key == pygame.K_ESCAPE:
-                    self.pause_menu()
+                if event.key in (pygame.K_SPACE, pygame.K_ESCAPE):
+                    pressed.append(event.key)
+                elif event.key == PROFILE_KEY:
+                    self.profiler.toggle_overlay()
+                    self.full_redraw = True
+        return pressed
 
     def update(self, delta_time):
-        """Update game state."""
+        """Advance the game state by one simulation tick.
+
+        Timers and spawn chances are expressed in seconds, so gameplay is the
+        same at any tick rate.
+
+        Args:
+            delta_time (float): Length of the tick in seconds.
+        """
+        if not self.headless:
+            # Remember where sprites were so frames can interpolate between ticks
+            self.previous_centers = {sprite: sprite.rect.center for sprite in self.all_sprites}
         self.all_sprites.update(delta_time)
+        self.projectiles.update(delta_time)
+        self.particles.update(delta_time)
         self.starry_background.update(delta_time)
-        self.level_counter += 1
+        self.profiler.lap('update')
+        self.level_counter += delta_time
 
-        if self.level_counter >= 1000:
+        if self.level_counter >= LEVEL_DURATION:
             self.level_counter = 0
             self.level += 1
 
@@ -159,23 +2727,37 @@ class Game:
         else:  # Normal
             spawn_rate = max(60 - self.level * 2, 10)
 
-        if random.randint(1, spawn_rate) == 1:
-            enemy_type = random.choice(['normal', 'shooter']) if self.level >= 3 else 'normal'
+        # Spawns slow down in proportion to the load above its budget, and
+        # stop at the enemy cap. The roll always happens so the RNG sequence
+        # only depends on the simulation.
+        load = len(self.enemies) + len(self.projectiles) / 10
+        pacing = max(1, load / SPAWN_LOAD_BUDGET)
+        full = len(self.enemies) >= MAX_ENEMIES
+        self.governor.note('spawn_pacing', pacing > 1,
+                           f"spawn pacing: load {load:.0f} over {SPAWN_LOAD_BUDGET}")
+        self.governor.note('enemy_cap', full, f"enemy cap: {MAX_ENEMIES} enemies")
+        # One spawn per spawn_rate frames at 60 fps, on average
+        if self.rng.random() * spawn_rate * pacing < delta_time * 60 and not full:
+            enemy_type = self.rng.choice(['normal', 'shooter']) if self.level >= 3 else 'normal'
             if enemy_type == 'normal':
-                enemy = Enemy(self.level)
+                enemy = Enemy(self.level, self.rng)
             else:
                 enemy = ShooterEnemy(self, self.level, self.player)
             self.all_sprites.add(enemy)
             self.enemies.add(enemy)
 
-        self.next_powerup_time -= 1
+        self.next_powerup_time -= delta_time
+        # At the cap the spawn waits until a power-up is collected or leaves
+        capped = len(self.powerups) >= MAX_POWERUPS
         if self.next_powerup_time <= 0:
-            powerup_type = random.choice(['weapon', 'bomb', 'shield'])
-            position = (random.randint(20, WIDTH - 20), -20)
+            self.governor.note('powerup_cap', capped, f"power-up cap: {MAX_POWERUPS} power-ups")
+        if self.next_powerup_time <= 0 and not capped:
+            powerup_type = self.rng.choice(POWERUP_TYPES)
+            position = (self.rng.randint(20, WIDTH - 20), -20)
             powerup = PowerUp(powerup_type, position)
             self.all_sprites.add(powerup)
             self.powerups.add(powerup)
-            self.next_powerup_time = random.randint(500, 1000)
+            self.next_powerup_time = self.rng.randint(500, 1000) / 60
 
         # Decrease screen shake timer
         if self.shake_timer > 0:
@@ -184,16 +2766,21 @@ class Game:
                 self.shake_timer = 0
                 self.shake_intensity = 0  # Reset intensity when shake ends
 
-        # Collision detection with masks for pixel-perfect collisions
-        collision = pygame.sprite.groupcollide(
-            self.enemies, self.projectiles, True, True, pygame.sprite.collide_mask)
+        self.profiler.lap('spawn')
+
+        # Refile moved sprites in the broad-phase grids
+        self.enemy_grid.sync(self.enemies)
+        self.powerup_grid.sync(self.powerups)
+
+        # Collision detection, as precise as each sprite class asks for
+        collision = self.projectiles.collide(self.enemies.sprites(), PLAYER_SHOT, self.narrow_phase)
         if collision:
             for enemy in collision:
+                enemy.kill()
+                self.enemy_grid.remove(enemy)  # It must not reach the player this tick
                 self.score += 10
-                enemy_explosion = Explosion(enemy.rect.center)
-                self.all_sprites.add(enemy_explosion)
-                self.explosions.add(enemy_explosion)
-                self.explosion_sound.play()
+                self.explode(enemy.rect.center)
+                self.sounds.play('explosion')
                 # Start screen shake with reduced intensity (70% of 10 is 7)
                 # Only increase intensity and timer if they are lower
                 if self.shake_intensity < 7:
@@ -201,98 +2788,367 @@ class Game:
                 if self.shake_timer < 0.3:
                     self.shake_timer = 0.3
 
-        if pygame.sprite.spritecollide(self.player, self.enemy_projectiles, True, pygame.sprite.collide_mask):
+        if self.projectiles.collide([self.player], ENEMY_SHOT, self.narrow_phase):
             if self.player.shield > 0:
                 self.player.shield -= 1
             else:
                 self.player.lives -= 1
-                self.life_loss_sound.play()
+                self.sounds.play('life_loss')
                 if self.player.lives <= 0:
                     self.playing = False
 
-        player_collision = pygame.sprite.spritecollide(
-            self.player, self.enemies, True, pygame.sprite.collide_mask)
+        player_collision = self.enemy_grid.spritecollide(
+            self.player, True, self.narrow_phase)
         if player_collision:
             if self.player.shield > 0:
                 self.player.shield -= 1
             else:
                 self.player.lives -= 1
-                self.life_loss_sound.play()
+                self.sounds.play('life_loss')
                 if self.player.lives <= 0:
                     self.playing = False
 
-        powerup_collision = pygame.sprite.spritecollide(
-            self.player, self.powerups, True, pygame.sprite.collide_mask)
+        powerup_collision = self.powerup_grid.spritecollide(
+            self.player, True, self.narrow_phase)
         for powerup in powerup_collision:
-            self.powerup_sound.play()
+            self.sounds.play('powerup')
             if powerup.type == 'weapon':
                 self.player.weapon_level += 1
-                self.player.powerup_timer = 600
+                self.player.powerup_timer = 10  # Seconds
             elif powerup.type == 'bomb':
                 for enemy in self.enemies:
-                    enemy_explosion = Explosion(enemy.rect.center)
-                    self.all_sprites.add(enemy_explosion)
-                    self.explosions.add(enemy_explosion)
+                    self.explode(enemy.rect.center)
                     enemy.kill()
                     self.score += 10
-                explosion = Explosion(self.player.rect.center)
-                self.all_sprites.add(explosion)
-                self.explosions.add(explosion)
-                self.explosion_sound.play()
+                self.explode(self.player.rect.center, BOMB_PARTICLES)
+                self.sounds.play('explosion')
                 # Start screen shake with full intensity
                 self.shake_timer = 0.5  # Duration in seconds
                 self.shake_intensity = 10  # Intensity in pixels
             elif powerup.type == 'shield':
                 self.player.shield = 3
+        self.profiler.lap('collisions')
 
-    def draw(self):
-        """Draw everything on the screen."""
+    def explode(self, position, particles=KILL_PARTICLES):
+        """Start an explosion animation with a burst of particles.
+
+        Args:
+            position (tuple): Center of the explosion.
+            particles (int): Particles in the burst.
+        """
+        if self.governor.settings['explosions']:
+            self.explosion_pool.acquire((self.all_sprites, self.explosions), position)
+        self.particles.burst(position, particles)
+
+    def draw(self, alpha=1.0):
+        """Draw everything on the screen.
+
+        Args:
+            alpha (float): Fraction of a tick elapsed since the last update;
+                sprites are drawn that far between their previous and current
+                positions.
+        """
+        moved = []
+        if alpha < 1:
+            for sprite in self.all_sprites:
+                previous = self.previous_centers.get(sprite)
+                if previous is None:
+                    continue
+                center = sprite.rect.center
+                dx = center[0] - previous[0]
+                dy = center[1] - previous[1]
+                # Skip sprites that wrapped around the screen edge this tick
+                if abs(dx) > WIDTH / 2 or abs(dy) > HEIGHT / 2:
+                    continue
+                moved.append((sprite, center))
+                sprite.rect.center = (round(previous[0] + dx * alpha),
+                                      round(previous[1] + dy * alpha))
+
+        self.profiler.lap('interpolate')
+
+        # Apply screen shake effect
+        intensity = round(self.shake_intensity * self.governor.settings['shake'])
+        if self.shake_timer > 0 and intensity > 0:
+            shake_offset_x = random.randint(-intensity, intensity)
+            shake_offset_y = random.randint(-intensity, intensity)
+        else:
+            shake_offset_x = 0
+            shake_offset_y = 0
+
+        if self.scaled:
+            self.draw_scaled((shake_offset_x, shake_offset_y), alpha)
+        elif self.render_mode == 'full':
+            self.draw_full((shake_offset_x, shake_offset_y), alpha)
+        else:
+            self.draw_dirty((shake_offset_x, shake_offset_y), alpha)
+        if self.capture is not None:
+            self.capture.write(pygame.display.get_surface())
+            self.profiler.lap('capture')
+
+        # Put sprites back at their simulated positions
+        for sprite, center in moved:
+            sprite.rect.center = center
+
+    def draw_full(self, offset, alpha=1.0):
+        """Compose the whole frame on a temporary surface and flip it to the screen.
+
+        Args:
+            offset (tuple): Screen shake offset in pixels.
+            alpha (float): Fraction of a tick elapsed since the last update.
+        """
+        profiler = self.profiler
         # Create a temporary surface
         temp_surface = pygame.Surface((WIDTH, HEIGHT))
         temp_surface.fill(BLACK)
 
         # Draw the starry background and sprites on the temporary surface
         self.starry_background.draw(temp_surface)
+        profiler.lap('background')
         self.all_sprites.draw(temp_surface)
-
-        # Apply screen shake effect
-        if self.shake_timer > 0:
-            shake_offset_x = random.randint(-self.shake_intensity, self.shake_intensity)
-            shake_offset_y = random.randint(-self.shake_intensity, self.shake_intensity)
-        else:
-            shake_offset_x = 0
-            shake_offset_y = 0
+        self.projectiles.draw(temp_surface, alpha)
+        self.particles.draw(temp_surface)
 
         # Blit the temporary surface onto the main screen with offset
-        SCREEN.blit(temp_surface, (shake_offset_x, shake_offset_y))
+        SCREEN.blit(temp_surface, offset)
+        profiler.lap('sprites')
 
         # Draw UI elements directly on the main screen
-        score_text = game_font.render(f"Score: {self.score}", True, WHITE)
-        lives_text = game_font.render(f"Lives: {self.player.lives}", True, WHITE)
-        level_text = game_font.render(f"Level: {self.level}", True, WHITE)
-        SCREEN.blit(score_text, (10, 10))
-        SCREEN.blit(lives_text, (10, 40))
-        SCREEN.blit(level_text, (10, 70))
+        self.draw_hud(SCREEN)
+        profiler.lap('hud')
+
+        pygame.display.flip()
+        profiler.lap('present')
+        self.render_stats = {'rects': 1, 'pixels': WIDTH * HEIGHT}
+
+    def draw_scaled(self, offset, alpha=1.0):
+        """Draw the playfield at the render resolution and resize it into the window.
+
+        The whole canvas is redrawn every frame, since every window pixel
+        changes when it is resized. The HUD is drawn afterwards straight
+        into the window, so its text stays sharp at any resolution.
+
+        Args:
+            offset (tuple): Screen shake offset in game pixels.
+            alpha (float): Fraction of a tick elapsed since the last update.
+        """
+        profiler = self.profiler
+        scale = self.render_scale
+        canvas = self.canvas
+        canvas.fill(BLACK)
+        self.starry_background.draw(canvas, (round(offset[0] * scale), round(offset[1] * scale)),
+                                    scale)
+        profiler.lap('background')
+        canvas.blits([(assets.scaled(sprite.image, scale),
+                       (round((sprite.rect.x + offset[0]) * scale),
+                        round((sprite.rect.y + offset[1]) * scale)))
+                      for sprite in self.all_sprites], False)
+        self.projectiles.draw(canvas, alpha, offset, scale)
+        self.particles.draw(canvas, offset, scale)
+        profiler.lap('sprites')
+
+        window = pygame.display.get_surface()
+        area = self.playfield
+        if canvas.get_size() == area.size:
+            window.blit(canvas, area)
+        elif self.scaler == 'fast':
+            pygame.transform.scale(canvas, area.size, window.subsurface(area))
+        else:
+            pygame.transform.smoothscale(canvas, area.size, window.subsurface(area))
+        profiler.lap('scale')
+        self.draw_hud(window, self.output_scale, area.topleft)
+        profiler.lap('hud')
+        pygame.display.flip()
+        profiler.lap('present')
+        self.render_stats = {'rects': 1, 'pixels': area.width * area.height}
+
+    def draw_dirty(self, offset, alpha=1.0):
+        """Update the persistent screen in place and present only what changed.
+
+        Screen shake is a camera offset applied while drawing. Every frame
+        with a non-zero offset, and the first frame after one, is redrawn in
+        full because the whole view moves. So are frames with so many
+        projectiles that tracking their rects would cost more than a full redraw.
+
+        Args:
+            offset (tuple): Screen shake offset in pixels.
+            alpha (float): Fraction of a tick elapsed since the last update.
+        """
+        profiler = self.profiler
+        if (self.full_redraw or offset != (0, 0) or self.last_shake_offset != (0, 0)
+                or len(self.projectiles) > MAX_DIRTY_PROJECTILES):
+            SCREEN.fill(BLACK)
+            self.starry_background.draw(SCREEN, offset)
+            profiler.lap('background')
+            if offset == (0, 0):
+                # Group.draw also records where each sprite was drawn for the next clear
+                self.all_sprites.draw(SCREEN)
+            else:
+                SCREEN.blits([(sprite.image, sprite.rect.move(offset))
+                              for sprite in self.all_sprites], False)
+            self.projectiles.draw(SCREEN, alpha, offset)
+            self.particles.draw(SCREEN, offset)
+            profiler.lap('sprites')
+            self.hud_rects = self.draw_hud(SCREEN)
+            profiler.lap('hud')
+            pygame.display.flip()
+            profiler.lap('present')
+            self.full_redraw = False
+            self.last_shake_offset = offset
+            self.render_stats = {'rects': 1, 'pixels': WIDTH * HEIGHT}
+            return
+
+        # Erase last frame's sprites, HUD and moved stars, then draw back to front
+        self.all_sprites.clear(SCREEN, lambda surface, rect: surface.fill(BLACK, rect))
+        dirty = self.projectiles.drawn_rects + self.particles.drawn_rects
+        for rect in dirty + self.hud_rects:
+            SCREEN.fill(BLACK, rect)
+        dirty += self.starry_background.clear(SCREEN)
+        self.starry_background.draw(SCREEN)
+        profiler.lap('background')
+        dirty += self.all_sprites.draw(SCREEN)
+        dirty += self.projectiles.draw(SCREEN, alpha)
+        dirty += self.particles.draw(SCREEN)
+        profiler.lap('sprites')
+        dirty += self.hud_rects
+        self.hud_rects = self.draw_hud(SCREEN)
+        dirty += self.hud_rects
+        profiler.lap('hud')
+
+        pygame.display.update(dirty)
+        profiler.lap('present')
+        screen_rect = SCREEN.get_rect()
+        pixels = 0
+        for rect in dirty:
+            clipped = screen_rect.clip(rect)
+            pixels += clipped.width * clipped.height
+        self.render_stats = {'rects': len(dirty), 'pixels': pixels}
+
+    def hud_texts(self, scale=1):
+        """Return the HUD lines for a text scale, creating them on first use.
+
+        Args:
+            scale (float): Font size relative to FONT_SIZES.
+
+        Returns:
+            dict: HudText per key of HUD_LINES.
+        """
+        texts = self.huds.get(scale)
+        if texts is None:
+            # HUD lines are composed from cached glyphs when their value changes
+            atlas = GlyphAtlas(get_font('game', scale), WHITE)
+            texts = self.huds[scale] = {name: HudText(template, atlas)
+                                        for name, template in HUD_LINES.items()}
+        return texts
+
+    def draw_hud(self, surface, scale=1, origin=(0, 0)):
+        """Draw the score, lives, level and power-up status.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            scale (float): Surface pixels per game pixel; text is rendered
+                at that size rather than resized.
+            origin (tuple): Where the top-left corner of the playfield is
+                on the surface.
+
+        Returns:
+            list: Rects covered by the HUD text.
+        """
+        texts = self.hud_texts(scale)
+        def at(x, y):
+            return (origin[0] + round(x * scale), origin[1] + round(y * scale))
+        rects = [
+            surface.blit(texts['score'].render(self.score), at(10, 10)),
+            surface.blit(texts['lives'].render(self.player.lives), at(10, 40)),
+            surface.blit(texts['level'].render(self.level), at(10, 70)),
+        ]
 
         x_offset = WIDTH - 200
         if self.player.weapon_level > 1:
-            weapon_text = game_font.render(f"Weapon Lv{self.player.weapon_level}", True, WHITE)
-            weapon_time = game_font.render(f"Time: {self.player.powerup_timer // 60}s", True, WHITE)
-            SCREEN.blit(weapon_text, (x_offset, 10))
-            SCREEN.blit(weapon_time, (x_offset, 30))
+            weapon_text = texts['weapon'].render(self.player.weapon_level)
+            weapon_time = texts['weapon_time'].render(int(self.player.powerup_timer))
+            rects.append(surface.blit(weapon_text, at(x_offset, 10)))
+            rects.append(surface.blit(weapon_time, at(x_offset, 30)))
         if self.player.shield > 0:
-            shield_text = game_font.render(f"Shield: {self.player.shield}", True, WHITE)
-            SCREEN.blit(shield_text, (x_offset, 60))
+            shield_text = texts['shield'].render(self.player.shield)
+            rects.append(surface.blit(shield_text, at(x_offset, 60)))
+        if self.profiler.overlay:
+            left, bottom = at(10, HEIGHT)
+            rects.append(self.profiler.draw_overlay(
+                surface, (left, bottom - PROFILE_GRAPH_HEIGHT - 40)))
+        return rects
+
+    def menu_events(self, timeout=0):
+        """Wait for menu input instead of polling for it.
+
+        Args:
+            timeout (int): Longest wait in milliseconds, or 0 to sleep until an
+                event arrives.
+
+        Returns:
+            list: The events that arrived, empty if the wait timed out.
+        """
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        events = [event] + pygame.event.get()
+        if any(event.type in MENU_REDRAW_EVENTS for event in events):
+            self.menu_shown = None
+        return events
 
+    def show_menu(self, state, compose, animate=False):
+        """Present a menu screen unless it is already on screen.
+
+        The text of each state is composed once onto a transparent layer the
+        size of the playfield in the window, so showing it again, or over a
+        moving star field, is a single blit, and text is never resized.
+
+        Args:
+            state (tuple): Everything the screen shows, starting with the menu's
+                name.
+            compose (callable): Draws the menu's text for the state onto a
+                surface.
+            animate (bool): Advance and draw the star field behind the menu,
+                even if the state is unchanged.
+        """
+        if state == self.menu_shown and not animate:
+            return
+        layer = self.menu_layers.pop(state, None)
+        if layer is None:
+            if len(self.menu_layers) >= MENU_LAYER_CACHE:
+                del self.menu_layers[next(iter(self.menu_layers))]
+            layer = pygame.Surface(self.playfield.size)
+            layer.set_colorkey(BLACK)
+            compose(layer)
+        self.menu_layers[state] = layer  # Most recently shown last
+
+        window = pygame.display.get_surface()
+        window.fill(BLACK)
+        area = window.subsurface(self.playfield)
+        if animate:
+            self.starry_background.update(1 / MENU_ANIMATION_FPS)
+            self.starry_background.draw(area, scale=self.output_scale)
+        area.blit(layer, (0, 0))
         pygame.display.flip()
+        self.menu_shown = state
 
     def show_start_screen(self):
         """Display the initial menu."""
         menu_active = True
         selected_option = 0
         options = ["Start Game", "High Scores", "Settings", "Exit"]
+
+        def compose(surface):
+            draw_text(surface, 'title', "Py Space Shooter", WHITE, None, HEIGHT / 4)
+            for i, option in enumerate(options):
+                color = WHITE if i == selected_option else GRAY
+                draw_text(surface, 'menu', option, color, None, HEIGHT / 2 + i * 60)
+
+        frame_time = 1 / MENU_ANIMATION_FPS
+        next_frame = time.perf_counter()
         while menu_active:
-            for event in pygame.event.get():
+            # Sleep until a key is pressed or the next animation frame is due
+            timeout = max(1, round((next_frame - time.perf_counter()) * 1000))
+            for event in self.menu_events(timeout):
                 if event.type == pygame.QUIT:
                     menu_active = False
                     self.running = False
@@ -315,62 +3171,69 @@ class Game:
                     elif event.key == pygame.K_DOWN:
                         selected_option = (selected_option + 1) % len(options)
 
-            SCREEN.fill(BLACK)
-            title_text = title_font.render("Py Space Shooter", True, WHITE)
-            SCREEN.blit(title_text, ((WIDTH - title_text.get_width()) / 2, HEIGHT / 4))
-
-            for i, option in enumerate(options):
-                color = WHITE if i == selected_option else GRAY
-                text = menu_font.render(option, True, color)
-                SCREEN.blit(text, ((WIDTH - text.get_width()) / 2, HEIGHT / 2 + i * 60))
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            now = time.perf_counter()
+            animate = now >= next_frame
+            if animate:
+                next_frame = max(next_frame + frame_time, now)
+            self.show_menu(('start', selected_option), compose, animate)
+            startup.mark('menu')
 
     def show_high_scores(self):
         """Display the high scores screen."""
         high_scores_active = True
-        while high_scores_active:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    high_scores_active = False
-                    self.running = False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        high_scores_active = False
+        ranking = load_ranking()
+        state = ('high_scores',) + tuple((entry['name'], entry['score']) for entry in ranking[:10])
 
-            SCREEN.fill(BLACK)
-            title_text = title_font.render("High Scores", True, WHITE)
-            SCREEN.blit(title_text, ((WIDTH - title_text.get_width()) / 2, 50))
+        def compose(surface):
+            draw_text(surface, 'title', "High Scores", WHITE, None, 50)
 
-            ranking = load_ranking()
             if ranking:
                 for i, entry in enumerate(ranking[:10]):
                     name = entry['name']
                     points = entry['score']
-                    ranking_line = game_font.render(f"{i + 1}. {name} - {points}", True, WHITE)
-                    SCREEN.blit(ranking_line, (WIDTH // 4, 150 + i * 40))
+                    draw_text(surface, 'game', f"{i + 1}. {name} - {points}", WHITE, WIDTH // 4, 150 + i * 40)
             else:
-                no_scores_text = game_font.render("No high scores yet.", True, WHITE)
-                SCREEN.blit(no_scores_text, ((WIDTH - no_scores_text.get_width()) / 2, HEIGHT / 2))
+                draw_text(surface, 'game', "No high scores yet.", WHITE, None, HEIGHT / 2)
 
-            back_text = game_font.render("Press ESC to return", True, GRAY)
-            SCREEN.blit(back_text, ((WIDTH - back_text.get_width()) / 2, HEIGHT - 50))
+            draw_text(surface, 'game', "Press ESC to return", GRAY, None, HEIGHT - 50)
 
-            pygame.display.flip()
-            self.clock.tick(60)
+        self.show_menu(state, compose)
+        while high_scores_active:
+            for event in self.menu_events():
+                if event.type == pygame.QUIT:
+                    high_scores_active = False
+                    self.running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        high_scores_active = False
+
+            self.show_menu(state, compose)
 
     def show_settings(self):
         """Display the settings menu."""
         settings_active = True
         selected_option = 0
         options = ["Volume", "Difficulty", "Back"]
-        volume_level = int(pygame.mixer.music.get_volume() * 10)
-        difficulties = ["Easy", "Normal", "Hard"]
+        volume_level = round(self.sounds.music_volume * 10)
+        difficulties = DIFFICULTIES
         difficulty_index = difficulties.index(self.difficulty)
 
+        def compose(surface):
+            draw_text(surface, 'title', "Settings", WHITE, None, 50)
+
+            for i, option in enumerate(options):
+                color = WHITE if i == selected_option else GRAY
+                if option == "Volume":
+                    text = f"{option}: {volume_level}"
+                elif option == "Difficulty":
+                    text = f"{option}: {self.difficulty}"
+                else:
+                    text = option
+                draw_text(surface, 'menu', text, color, None, HEIGHT / 2 + i * 60)
+
+        self.show_menu(('settings', selected_option, volume_level, self.difficulty), compose)
         while settings_active:
-            for event in pygame.event.get():
+            for event in self.menu_events():
                 if event.type == pygame.QUIT:
                     settings_active = False
                     self.running = False
@@ -387,42 +3250,36 @@ class Game:
                     elif event.key == pygame.K_LEFT:
                         if selected_option == 0 and volume_level > 0:
                             volume_level -= 1
-                            pygame.mixer.music.set_volume(volume_level / 10)
+                            self.sounds.set_music_volume(volume_level / 10)
                         elif selected_option == 1:
                             difficulty_index = (difficulty_index - 1) % len(difficulties)
                             self.difficulty = difficulties[difficulty_index]
                     elif event.key == pygame.K_RIGHT:
                         if selected_option == 0 and volume_level < 10:
                             volume_level += 1
-                            pygame.mixer.music.set_volume(volume_level / 10)
+                            self.sounds.set_music_volume(volume_level / 10)
                         elif selected_option == 1:
                             difficulty_index = (difficulty_index + 1) % len(difficulties)
                             self.difficulty = difficulties[difficulty_index]
 
-            SCREEN.fill(BLACK)
-            title_text = title_font.render("Settings", True, WHITE)
-            SCREEN.blit(title_text, ((WIDTH - title_text.get_width()) / 2, 50))
-
-            for i, option in enumerate(options):
-                color = WHITE if i == selected_option else GRAY
-                if option == "Volume":
-                    text = menu_font.render(f"{option}: {volume_level}", True, color)
-                elif option == "Difficulty":
-                    text = menu_font.render(f"{option}: {self.difficulty}", True, color)
-                else:
-                    text = menu_font.render(option, True, color)
-                SCREEN.blit(text, ((WIDTH - text.get_width()) / 2, HEIGHT / 2 + i * 60))
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.show_menu(('settings', selected_option, volume_level, self.difficulty), compose)
 
     def pause_menu(self):
         """Display the pause menu."""
         paused = True
         selected_option = 0
         options = ["Continue", "Exit"]
+
+        def compose(surface):
+            draw_text(surface, 'title', "PAUSE", WHITE, None, HEIGHT / 4)
+
+            for i, option in enumerate(options):
+                color = WHITE if i == selected_option else GRAY
+                draw_text(surface, 'menu', option, color, None, HEIGHT / 2 + i * 50)
+
+        self.show_menu(('pause', selected_option), compose)
         while paused:
-            for event in pygame.event.get():
+            for event in self.menu_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -440,26 +3297,42 @@ class Game:
                     elif event.key == pygame.K_DOWN:
                         selected_option = (selected_option + 1) % len(options)
 
-            SCREEN.fill(BLACK)
-            title_text = title_font.render("PAUSE", True, WHITE)
-            SCREEN.blit(title_text, ((WIDTH - title_text.get_width()) / 2, HEIGHT / 4))
-
-            for i, option in enumerate(options):
-                color = WHITE if i == selected_option else GRAY
-                text = menu_font.render(option, True, color)
-                SCREEN.blit(text, ((WIDTH - text.get_width()) / 2, HEIGHT / 2 + i * 50))
+            self.show_menu(('pause', selected_option), compose)
 
-            pygame.display.flip()
-            self.clock.tick(60)
+        # The menu drew over the game screen
+        self.full_redraw = True
+        self.menu_shown = None
+        # Don't let the simulation catch up on the time spent paused
+        self.clock.tick()
 
     def game_over(self):
         """Display the game over screen and save the score."""
         save_score(self.player_initials, self.score)
         ranking = load_ranking()
 
+        def compose(surface):
+            # Display title and options on the screen
+            draw_text(surface, 'title', "GAME OVER", RED, None, 50)
+            draw_text(surface, 'menu', f"Your Score: {self.score}", WHITE, None, 150)
+            draw_text(surface, 'menu', "Press Enter to Restart", WHITE, None, 500)
+            draw_text(surface, 'menu', "Press Esc to Exit", WHITE, None, 550)
+
+            # Ranking Title
+            draw_text(surface, 'menu', "Ranking - Top 5", WHITE, WIDTH // 4, 200)
+
+            # Display the ranking with highlight for the player
+            for i, entry in enumerate(ranking[:5]):
+                name = entry['name']
+                points = entry['score']
+                color = WHITE if name != self.player_initials else YELLOW  # Highlight current player
+                draw_text(surface, 'game', f"{i + 1}. {name} - {points}", color, WIDTH // 4, 250 + i * 40)
+
         game_over_active = True
+        state = (('game_over', self.score, self.player_initials) +
+                 tuple((entry['name'], entry['score']) for entry in ranking[:5]))
+        self.show_menu(state, compose)
         while game_over_active:
-            for event in pygame.event.get():
+            for event in self.menu_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -470,41 +3343,23 @@ class Game:
                         pygame.quit()
                         sys.exit()
 
-            SCREEN.fill(BLACK)
-
-            # Game Over Title
-            game_over_text = title_font.render("GAME OVER", True, RED)
-            score_text = menu_font.render(f"Your Score: {self.score}", True, WHITE)
-            restart_text = menu_font.render("Press Enter to Restart", True, WHITE)
-            quit_text = menu_font.render("Press Esc to Exit", True, WHITE)
-
-            # Display title and options on the screen
-            SCREEN.blit(game_over_text, ((WIDTH - game_over_text.get_width()) / 2, 50))
-            SCREEN.blit(score_text, ((WIDTH - score_text.get_width()) / 2, 150))
-            SCREEN.blit(restart_text, ((WIDTH - restart_text.get_width()) / 2, 500))
-            SCREEN.blit(quit_text, ((WIDTH - quit_text.get_width()) / 2, 550))
-
-            # Ranking Title
-            ranking_title = menu_font.render("Ranking - Top 5", True, WHITE)
-            SCREEN.blit(ranking_title, (WIDTH // 4, 200))
-
-            # Display the ranking with highlight for the player
-            for i, entry in enumerate(ranking[:5]):
-                name = entry['name']
-                points = entry['score']
-                color = WHITE if name != self.player_initials else YELLOW  # Highlight current player
-                ranking_line = game_font.render(f"{i + 1}. {name} - {points}", True, color)
-                SCREEN.blit(ranking_line, (WIDTH // 4, 250 + i * 40))  # Space between lines
+            self.show_menu(state, compose)
 
-            pygame.display.flip()
-            self.clock.tick(60)
+        # The next game draws over the menu
+        self.menu_shown = None
 
     def capture_initials(self):
         """Capture the player's initials."""
         initials = ""
         capturing = True
+
+        def compose(surface):
+            draw_text(surface, 'menu', "Enter your initials", WHITE, None, HEIGHT / 2 - 50)
+            draw_text(surface, 'menu', initials, WHITE, None, HEIGHT / 2)
+
+        self.show_menu(('initials', initials), compose)
         while capturing:
-            for event in pygame.event.get():
+            for event in self.menu_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -516,67 +3371,176 @@ class Game:
                     elif len(initials) < 3 and event.unicode.isalpha():
                         initials += event.unicode.upper()
 
-            SCREEN.fill(BLACK)
-            title_text = menu_font.render("Enter your initials", True, WHITE)
-            initials_text = menu_font.render(initials, True, WHITE)
-            SCREEN.blit(title_text, ((WIDTH - title_text.get_width()) / 2, HEIGHT / 2 - 50))
-            SCREEN.blit(initials_text, ((WIDTH - initials_text.get_width()) / 2, HEIGHT / 2))
-
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.show_menu(('initials', initials), compose)
 
         self.player_initials = initials
 
 class StarryBackground:
-    """Class for the starry background with parallax effect."""
+    """Class for the starry background with parallax effect.
 
-    def __init__(self, num_stars):
+    Star positions and sizes are stored as NumPy arrays of shape
+    (layers, num_stars), so movement and wraparound are updated in one batched
+    operation, and stars are drawn by blitting pre-rendered stamps.
+    """
+
+    def __init__(self, num_stars, rng=random, width=WIDTH, height=HEIGHT):
         """Initialize the starry background.
 
         Args:
             num_stars (int): Number of stars per layer.
+            rng (random.Random): Random number generator for star placement.
+            width (int): Width of the star field in pixels.
+            height (int): Height of the star field in pixels.
         """
-        self.layers = []
-        for i in range(3):  # Three layers for parallax effect
-            stars = []
-            for _ in range(num_stars):
-                x = random.randrange(0, WIDTH)
-                y = random.randrange(0, HEIGHT)
-                size = random.choice([1, 2])
-                speed = (i + 1) * 0.1  # Different speeds for each layer
-                stars.append([x, y, size, speed])
-            self.layers.append(stars)
+        self.width = width
+        self.height = height
+        # Seed NumPy from the game RNG so seeded games stay reproducible
+        self.rng = np.random.default_rng(rng.getrandbits(64))
+        shape = (3, num_stars)  # Three layers for parallax effect
+        self.x = self.rng.integers(0, width, shape).astype(np.float64)
+        self.y = self.rng.integers(0, height, shape).astype(np.float64)
+        self.size = self.rng.integers(1, 3, shape)
+        self.speed = np.array([[0.1], [0.2], [0.3]])  # Different speeds for each layer
+        self.visible = num_stars  # Stars drawn per layer
+        self.stamps = {size: self._stamp(size) for size in (1, 2)}
+        self.drawn = None  # Integer positions and sizes of the last draw
+        # Pixel offsets covered by each stamp, relative to the star's center
+        self.offsets = {}
+        for size, stamp in self.stamps.items():
+            dx, dy = np.nonzero(pygame.surfarray.array2d(stamp))
+            self.offsets[size] = (dx - size, dy - size)
+
+    @staticmethod
+    def _stamp(radius, color=WHITE):
+        """Pre-render a star of a given radius on a transparent surface."""
+        stamp = pygame.Surface((radius * 2 + 1, radius * 2 + 1))
+        background = WHITE if color == BLACK else BLACK
+        stamp.fill(background)
+        stamp.set_colorkey(background)
+        pygame.draw.circle(stamp, color, (radius, radius), radius)
+        return stamp
 
     def update(self, delta_time):
         """Update star positions."""
-        for stars in self.layers:
-            for star in stars:
-                star[1] += star[3] * delta_time * 60
-                if star[1] > HEIGHT:
-                    star[0] = random.randrange(0, WIDTH)
-                    star[1] = -star[2]
-                    star[2] = random.choice([1, 2])
-
-    def draw(self, screen):
+        self.y += self.speed * (delta_time * 60)
+        wrapped = self.y > self.height
+        count = np.count_nonzero(wrapped)
+        if count:
+            self.x[wrapped] = self.rng.integers(0, self.width, count)
+            self.y[wrapped] = -self.size[wrapped]
+            self.size[wrapped] = self.rng.integers(1, 3, count)
+
+    def get_state(self):
+        """Return copies of the star arrays and the state of the star RNG."""
+        return {'x': self.x.copy(), 'y': self.y.copy(), 'size': self.size.copy(),
+                'rng': self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        """Move the stars to a ``get_state`` result."""
+        self.x = np.array(state['x'], dtype=np.float64)
+        self.y = np.array(state['y'], dtype=np.float64)
+        self.size = np.array(state['size'])
+        self.rng.bit_generator.state = state['rng']
+        self.drawn = None
+
+    def draw(self, screen, offset=(0, 0), scale=1):
         """Draw the stars on the screen.
 
+        Stars are written straight into the surface's pixel array. Surfaces
+        whose format cannot be referenced as a 2D array get the stamps blitted.
+
         Args:
             screen (pygame.Surface): The screen to draw on.
+            offset (tuple): Camera offset in screen pixels.
+            scale (float): Screen pixels per game pixel. Positions are
+                scaled; the stars keep their size.
+        """
+        n = self.visible
+        x = self.x[:, :n].astype(np.int32)
+        y = self.y[:, :n].astype(np.int32)
+        if scale != 1:
+            x = (self.x[:, :n] * scale).astype(np.int32)
+            y = (self.y[:, :n] * scale).astype(np.int32)
+        size = self.size[:, :n].copy()
+        self.drawn = (x, y, size)
+        self._plot(screen, x + offset[0], y + offset[1], size, WHITE)
+
+    def clear(self, screen):
+        """Erase stars whose pixel position or size changed since the last draw.
+
+        Args:
+            screen (pygame.Surface): The screen the stars were drawn on.
+
+        Returns:
+            list: Rects covering the old and new footprints of the changed stars.
+        """
+        if self.drawn is None:
+            return [screen.get_rect()]
+        old_x, old_y, old_size = self.drawn
+        n = self.visible
+        if old_x.shape[1] != n:
+            # The star count changed: erase every old star and redraw the lot
+            self._plot(screen, old_x, old_y, old_size, BLACK)
+            return [screen.get_rect()]
+        x = self.x[:, :n].astype(np.int32)
+        y = self.y[:, :n].astype(np.int32)
+        size = self.size[:, :n]
+        changed = (x != old_x) | (y != old_y) | (size != old_size)
+        if not np.any(changed):
+            return []
+        self._plot(screen, old_x[changed], old_y[changed], old_size[changed], BLACK)
+        cx = np.concatenate((old_x[changed], x[changed]))
+        cy = np.concatenate((old_y[changed], y[changed]))
+        size = np.concatenate((old_size[changed], size[changed]))
+        if len(cx) > MAX_STAR_RECTS:
+            # Too many small rects cost more to build than one bounding rect
+            left, top = int((cx - size).min()), int((cy - size).min())
+            right, bottom = int((cx + size).max()) + 1, int((cy + size).max()) + 1
+            return [pygame.Rect(left, top, right - left, bottom - top)]
+        return [pygame.Rect(left, top, side, side) for left, top, side in
+                zip((cx - size).tolist(), (cy - size).tolist(), (size * 2 + 1).tolist())]
+
+    def _plot(self, screen, x, y, size, color):
+        """Stamp stars of the given sizes centered on integer positions.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            x (numpy.ndarray): Star center x coordinates.
+            y (numpy.ndarray): Star center y coordinates.
+            size (numpy.ndarray): Star radii (1 or 2).
+            color (tuple): Color to stamp with.
         """
-        for stars in self.layers:
-            for star in stars:
-                pygame.draw.circle(screen, WHITE, (int(star[0]), int(star[1])), star[2])
+        try:
+            pixels = pygame.surfarray.pixels2d(screen)
+        except ValueError:
+            for radius, stamp in self.stamps.items():
+                selected = size == radius
+                positions = np.stack((x[selected] - radius, y[selected] - radius), axis=1).tolist()
+                if color != WHITE:
+                    stamp = self._stamp(radius, color)
+                screen.blits([(stamp, position) for position in positions], False)
+            return
+        width, height = pixels.shape
+        mapped = screen.map_rgb(color)
+        for radius, (dx, dy) in self.offsets.items():
+            selected = size == radius
+            px = (x[selected, None] + dx).ravel()
+            py = (y[selected, None] + dy).ravel()
+            visible = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            pixels[px[visible], py[visible]] = mapped
+        del pixels  # Unlock the surface
 
 class Player(pygame.sprite.Sprite):
     """Class for the player."""
 
+    precision = COLLIDE_MASK
+
     def __init__(self):
         """Initialize the player."""
         super().__init__()
         # Replace 'images/player_ship.png' with the path to your player ship image
-        self.image_orig = pygame.image.load('images/player_ship.png').convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (50, 50))
-        self.image = self.image_orig.copy()
+        self.image_orig = assets.image('images/player_ship.png', (50, 50))
+        self.image = self.image_orig
         self.rect = self.image.get_rect(center=(WIDTH / 2, HEIGHT / 2))
         self.pos = pygame.math.Vector2(self.rect.center)
         self.speed = 0
@@ -585,15 +3549,17 @@ class Player(pygame.sprite.Sprite):
         self.weapon_level = 1
         self.powerup_timer = 0
         self.shield = 0
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = assets.mask('images/player_ship.png', (50, 50))
+        self.radius = assets.radius('images/player_ship.png', (50, 50))
+        self.keys = None  # Scripted KeyState; None polls the keyboard
 
     def update(self, delta_time):
         """Update the player's position and rotation."""
-        keys = pygame.key.get_pressed()
+        keys = self.keys if self.keys is not None else pygame.key.get_pressed()
         rotation_speed = 200  # Degrees per second
         acceleration = 300     # Pixels per second squared
         max_speed = 300        # Pixels per second
-        friction = 0.95
+        friction = 0.95         # Fraction of speed kept per 1/60 s without thrust
 
         if keys[pygame.K_LEFT]:
             self.angle += rotation_speed * delta_time
@@ -604,7 +3570,7 @@ class Player(pygame.sprite.Sprite):
         elif keys[pygame.K_DOWN]:
             self.speed -= acceleration * delta_time
         else:
-            self.speed *= friction
+            self.speed *= friction ** (delta_time * 60)
 
         self.speed = max(min(self.speed, max_speed), -max_speed)
         rad = math.radians(self.angle)
@@ -614,16 +3580,27 @@ class Player(pygame.sprite.Sprite):
         self.pos.x %= WIDTH
         self.pos.y %= HEIGHT
 
-        self.rect.center = self.pos
-        self.image = pygame.transform.rotate(self.image_orig, self.angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image, self.mask = assets.rotated('images/player_ship.png', (50, 50), self.angle)
+        self.rect = self.image.get_rect(center=self.pos)
 
         if self.powerup_timer > 0:
-            self.powerup_timer -= 1
-            if self.powerup_timer == 0:
+            self.powerup_timer -= delta_time
+            if self.powerup_timer <= 0:
+                self.powerup_timer = 0
                 self.weapon_level = 1
 
+    def get_state(self):
+        """Return the player's SPRITE_STATE row; lives, weapon and shield are kept by GameState."""
+        return (STATE_PLAYER, self.pos.x, self.pos.y, self.speed, self.angle,
+                self.powerup_timer, 0)
+
+    def set_state(self, row):
+        """Move the player to a saved SPRITE_STATE row."""
+        _, x, y, self.speed, self.angle, self.powerup_timer, _ = row
+        self.pos.update(x, y)
+        self.image, self.mask = assets.rotated('images/player_ship.png', (50, 50), self.angle)
+        self.rect = self.image.get_rect(center=self.pos)
+
     def shoot(self, game):
         """Fire a projectile.
 
@@ -635,80 +3612,49 @@ class Player(pygame.sprite.Sprite):
         front_tip = self.pos + direction * 25
 
         if self.weapon_level == 1:
-            projectile = Projectile(front_tip, direction * 500, self.angle)
-            game.all_sprites.add(projectile)
-            game.projectiles.add(projectile)
+            game.projectiles.spawn(front_tip, direction * 500, self.angle, PLAYER_SHOT)
         elif self.weapon_level == 2:
             angles = [-10, 0, 10]
             for a in angles:
                 rad_offset = math.radians(self.angle + a)
                 direction_offset = pygame.math.Vector2(-math.sin(rad_offset), -math.cos(rad_offset))
-                projectile = Projectile(front_tip, direction_offset * 500, self.angle + a)
-                game.all_sprites.add(projectile)
-                game.projectiles.add(projectile)
+                game.projectiles.spawn(
+                    front_tip, direction_offset * 500, self.angle + a, PLAYER_SHOT)
         elif self.weapon_level >= 3:
             angles = [-20, -10, 0, 10, 20]
             for a in angles:
                 rad_offset = math.radians(self.angle + a)
                 direction_offset = pygame.math.Vector2(-math.sin(rad_offset), -math.cos(rad_offset))
-                projectile = Projectile(front_tip, direction_offset * 500, self.angle + a)
-                game.all_sprites.add(projectile)
-                game.projectiles.add(projectile)
-
-        game.shot_sound.play()
-
-class Projectile(pygame.sprite.Sprite):
-    """Class for projectiles."""
-
-    def __init__(self, position, velocity, angle):
-        """Initialize the projectile.
-
-        Args:
-            position (tuple): Starting position of the projectile.
-            velocity (pygame.math.Vector2): Velocity vector of the projectile.
-            angle (float): Angle at which the projectile is fired.
-        """
-        super().__init__()
-        # Load the projectile image
-        self.image_orig = pygame.image.load('images/laser.png').convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (10, 30))
-        # Rotate the image by the angle
-        self.image = pygame.transform.rotate(self.image_orig, angle)
-        self.rect = self.image.get_rect(center=position)
-        self.pos = pygame.math.Vector2(position)
-        self.velocity = velocity
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def update(self, delta_time):
-        """Update projectile position."""
-        self.pos += self.velocity * delta_time
-        self.rect.center = self.pos
+                game.projectiles.spawn(
+                    front_tip, direction_offset * 500, self.angle + a, PLAYER_SHOT)
 
-        if (self.rect.right < 0 or self.rect.left > WIDTH or
-                self.rect.bottom < 0 or self.rect.top > HEIGHT):
-            self.kill()
+        game.sounds.play('shot')
 
 class Enemy(pygame.sprite.Sprite):
     """Class for enemies."""
 
-    def __init__(self, level):
+    precision = COLLIDE_MASK
+    image_path = 'images/enemy_ship.png'
+
+    def __init__(self, level, rng=random):
         """Initialize the enemy.
 
         Args:
             level (int): Current game level.
+            rng (random.Random): Random number generator for spawn position and speed.
         """
         super().__init__()
         # Replace 'images/enemy_ship.png' with the path to your enemy image
-        self.image_orig = pygame.image.load('images/enemy_ship.png').convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (50, 50))
-        self.image = self.image_orig.copy()
+        self.image_orig = assets.image('images/enemy_ship.png', (50, 50))
+        self.image = self.image_orig
         self.rect = self.image.get_rect()
-        self.pos = pygame.math.Vector2(random.randrange(WIDTH), -50)
+        self.pos = pygame.math.Vector2(rng.randrange(WIDTH), -50)
         self.rect.center = self.pos
-        base_speed = random.uniform(100, 200)
+        base_speed = rng.uniform(100, 200)
         self.velocity = pygame.math.Vector2(0, base_speed + level * 10)
         self.level = level
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = assets.mask('images/enemy_ship.png', (50, 50))
+        self.radius = assets.radius('images/enemy_ship.png', (50, 50))
 
     def update(self, delta_time):
         """Update enemy position."""
@@ -718,9 +3664,38 @@ class Enemy(pygame.sprite.Sprite):
         if self.rect.top > HEIGHT:
             self.kill()
 
+    def get_state(self):
+        """Return the enemy's SPRITE_STATE row."""
+        return (STATE_ENEMY, self.pos.x, self.pos.y, self.velocity.x, self.velocity.y,
+                0, self.level)
+
+    @classmethod
+    def from_state(cls, game, row):
+        """Rebuild an enemy from a SPRITE_STATE row without touching the game RNG.
+
+        Args:
+            game (Game): The game the enemy belongs to.
+            row (tuple): Row saved by ``get_state``.
+
+        Returns:
+            Enemy: The enemy, in no groups.
+        """
+        enemy = cls.__new__(cls)
+        pygame.sprite.Sprite.__init__(enemy)
+        _, x, y, vx, vy, _, enemy.level = row
+        enemy.image_orig = enemy.image = assets.image(cls.image_path, (50, 50))
+        enemy.pos = pygame.math.Vector2(x, y)
+        enemy.rect = enemy.image.get_rect(center=enemy.pos)
+        enemy.velocity = pygame.math.Vector2(vx, vy)
+        enemy.mask = assets.mask(cls.image_path, (50, 50))
+        enemy.radius = assets.radius(cls.image_path, (50, 50))
+        return enemy
+
 class ShooterEnemy(Enemy):
     """Class for enemies that shoot projectiles."""
 
+    image_path = 'images/shooter_enemy.png'
+
     def __init__(self, game, level, player):
         """Initialize the shooter enemy.
 
@@ -729,66 +3704,53 @@ class ShooterEnemy(Enemy):
             level (int): Current game level.
             player (Player): The player object to target.
         """
-        super().__init__(level)
+        super().__init__(level, game.rng)
         # Replace 'images/shooter_enemy.png' with the path to your shooter enemy image
-        self.image_orig = pygame.image.load('images/shooter_enemy.png').convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (50, 50))
-        self.image = self.image_orig.copy()
-        self.shoot_timer = random.randint(60, 120)
+        self.image_orig = assets.image('images/shooter_enemy.png', (50, 50))
+        self.image = self.image_orig
+        self.shoot_timer = game.rng.randint(60, 120) / 60  # Seconds
         self.player = player
         self.game = game
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = assets.mask('images/shooter_enemy.png', (50, 50))
+        self.radius = assets.radius('images/shooter_enemy.png', (50, 50))
 
     def update(self, delta_time):
         """Update shooter enemy position and check if it should shoot."""
         super().update(delta_time)
-        self.shoot_timer -= 1
+        self.shoot_timer -= delta_time
         if self.shoot_timer <= 0:
             self.shoot()
-            self.shoot_timer = random.randint(60, 120)
+            self.shoot_timer = self.game.rng.randint(60, 120) / 60
+
+    def get_state(self):
+        """Return the shooter's SPRITE_STATE row, with its shot timer."""
+        return (STATE_SHOOTER, self.pos.x, self.pos.y, self.velocity.x, self.velocity.y,
+                self.shoot_timer, self.level)
+
+    @classmethod
+    def from_state(cls, game, row):
+        """Rebuild a shooter enemy from a SPRITE_STATE row, aiming at the game's player."""
+        enemy = super().from_state(game, row)
+        enemy.shoot_timer = row[5]
+        enemy.player = game.player
+        enemy.game = game
+        return enemy
 
     def shoot(self):
-        """Fire a projectile toward the player."""
+        """Fire a projectile toward the player, unless enemy fire is at its cap."""
+        full = self.game.projectiles.owned(ENEMY_SHOT) >= MAX_ENEMY_SHOTS
+        self.game.governor.note('enemy_shot_cap', full, f"enemy shot cap: {MAX_ENEMY_SHOTS} shots")
+        if full:
+            return
         direction = (self.player.pos - self.pos).normalize()
         angle = math.degrees(math.atan2(-direction.y, -direction.x)) + 90
-        projectile = EnemyProjectile(self.pos, direction * 300, angle)
-        self.game.all_sprites.add(projectile)
-        self.game.enemy_projectiles.add(projectile)
-
-class EnemyProjectile(pygame.sprite.Sprite):
-    """Class for enemy projectiles."""
-
-    def __init__(self, position, velocity, angle):
-        """Initialize the enemy projectile.
-
-        Args:
-            position (tuple): Starting position of the projectile.
-            velocity (pygame.math.Vector2): Velocity vector of the projectile.
-            angle (float): Angle at which the projectile is fired.
-        """
-        super().__init__()
-        # Load the projectile image
-        self.image_orig = pygame.image.load('images/enemy_laser.png').convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (9, 30))  # Corrected size
-        # Rotate the image by the angle
-        self.image = pygame.transform.rotate(self.image_orig, angle)
-        self.rect = self.image.get_rect(center=position)
-        self.pos = pygame.math.Vector2(position)
-        self.velocity = velocity
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def update(self, delta_time):
-        """Update enemy projectile position."""
-        self.pos += self.velocity * delta_time
-        self.rect.center = self.pos
-
-        if (self.rect.right < 0 or self.rect.left > WIDTH or
-                self.rect.bottom < 0 or self.rect.top > HEIGHT):
-            self.kill()
+        self.game.projectiles.spawn(self.pos, direction * 300, angle, ENEMY_SHOT)
 
 class PowerUp(pygame.sprite.Sprite):
     """Class for power-ups."""
 
+    precision = COLLIDE_CIRCLE  # Pickups are round enough; no mask test needed
+
     def __init__(self, type_, position):
         """Initialize the power-up.
 
@@ -808,27 +3770,57 @@ class PowerUp(pygame.sprite.Sprite):
         else:
             image_path = 'images/powerup.png'  # Default power-up image
 
-        self.image_orig = pygame.image.load(image_path).convert_alpha()
-        self.image_orig = pygame.transform.scale(self.image_orig, (30, 30))
-        self.image = self.image_orig.copy()
+        self.image_path = image_path
+        self.image_orig = assets.image(image_path, (30, 30))
+        self.image = self.image_orig
         self.rect = self.image.get_rect(center=position)
+        self.pos = pygame.math.Vector2(self.rect.center)
         self.velocity = pygame.math.Vector2(0, 100)
         self.angle = 0  # For rotation animation
         self.rotation_speed = 100  # Degrees per second
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = assets.mask(image_path, (30, 30))
+        self.radius = assets.radius(image_path, (30, 30))
 
     def update(self, delta_time):
         """Update power-up position."""
-        self.rect.move_ip(self.velocity.x * delta_time, self.velocity.y * delta_time)
+        self.pos += self.velocity * delta_time
+        self.angle = (self.angle + self.rotation_speed * delta_time) % 360
+        self.image, self.mask = assets.rotated(self.image_path, (30, 30), self.angle)
+        self.rect = self.image.get_rect(center=self.pos)
         if self.rect.top > HEIGHT:
             self.kill()
 
-        self.angle = (self.angle + self.rotation_speed * delta_time) % 360
-        self.image = pygame.transform.rotate(self.image_orig, self.angle)
-        self.rect = self.image.get_rect(center=self.rect.center)
-        self.mask = pygame.mask.from_surface(self.image)
+    def get_state(self):
+        """Return the power-up's SPRITE_STATE row, with its type as an index."""
+        return (STATE_POWERUP, self.pos.x, self.pos.y, self.velocity.x,
+                self.velocity.y, self.angle, POWERUP_TYPES.index(self.type))
 
-class Explosion(pygame.sprite.Sprite):
+    @classmethod
+    def from_state(cls, game, row):
+        """Rebuild a power-up from a SPRITE_STATE row.
+
+        Args:
+            game (Game): The game the power-up belongs to.
+            row (tuple): Row saved by ``get_state``.
+
+        Returns:
+            PowerUp: The power-up, in no groups.
+        """
+        powerup = cls.__new__(cls)
+        pygame.sprite.Sprite.__init__(powerup)
+        _, x, y, vx, vy, powerup.angle, type_index = row
+        powerup.type = POWERUP_TYPES[type_index]
+        powerup.image_path = f'images/powerup_{powerup.type}.png'
+        powerup.image_orig = assets.image(powerup.image_path, (30, 30))
+        powerup.image, powerup.mask = assets.rotated(powerup.image_path, (30, 30), powerup.angle)
+        powerup.pos = pygame.math.Vector2(x, y)
+        powerup.rect = powerup.image.get_rect(center=powerup.pos)
+        powerup.velocity = pygame.math.Vector2(vx, vy)
+        powerup.rotation_speed = 100
+        powerup.radius = assets.radius(powerup.image_path, (30, 30))
+        return powerup
+
+class Explosion(PooledSprite):
     """Class for explosions."""
 
     def __init__(self, position):
@@ -839,21 +3831,38 @@ class Explosion(pygame.sprite.Sprite):
         """
         super().__init__()
         # Load explosion animation frames
-        self.frames = []
-        for i in range(9):  # Ensure you have 9 frames named explosion0.png to explosion8.png
-            frame = pygame.image.load(f'images/explosion{i}.png').convert_alpha()
-            frame = pygame.transform.scale(frame, (75, 75))
-            self.frames.append(frame)
+        # Ensure you have 9 frames named explosion0.png to explosion8.png
+        self.frames = [assets.image(f'images/explosion{i}.png', (75, 75)) for i in range(9)]
+        self.frame_rate = 15  # Adjust as needed
+        self.reset(position)
+
+    def reset(self, position):
+        """Restart a pooled explosion's animation at a new position.
+
+        Args:
+            position (tuple): Position of the explosion.
+        """
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
         self.rect = self.image.get_rect(center=position)
-        self.frame_rate = 15  # Adjust as needed
-        self.last_update = pygame.time.get_ticks()
+        self.frame_time = 0  # Milliseconds of game time since the last frame change
+
+    def get_state(self):
+        """Return the explosion's SPRITE_STATE row, with its animation frame."""
+        return (STATE_EXPLOSION, self.rect.centerx, self.rect.centery, 0, 0,
+                self.frame_time, self.current_frame)
+
+    def set_state(self, row):
+        """Seek the animation to a saved SPRITE_STATE row."""
+        _, x, y, _, _, self.frame_time, self.current_frame = row
+        self.image = self.frames[self.current_frame]
+        self.rect = self.image.get_rect(center=(int(x), int(y)))
 
     def update(self, delta_time):
-        now = pygame.time.get_ticks()
-        if now - self.last_update > 1000 // self.frame_rate:
-            self.last_update = now
+        # Advance on game time rather than wall time so headless runs are reproducible
+        self.frame_time += delta_time * 1000
+        if self.frame_time > 1000 // self.frame_rate:
+            self.frame_time = 0
             self.current_frame += 1
             if self.current_frame >= len(self.frames):
                 self.kill()
@@ -862,9 +3871,56 @@ class Explosion(pygame.sprite.Sprite):
                 self.image = self.frames[self.current_frame]
                 self.rect = self.image.get_rect(center=center)
 
+startup.mark('import')
+
 # Run the game
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Py Space Shooter")
+    parser.add_argument('--record', metavar='DIR', help="Record a replay of every game into DIR")
+    parser.add_argument('--replay', metavar='FILE', help="Play back a recorded replay")
+    parser.add_argument('--headless', action='store_true',
+                        help="With --replay, re-simulate without a window as fast as possible")
+    parser.add_argument('--speed', type=float, default=1.0, help="With --replay, playback speed")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="Record frame timings and write the last frames to FILE "
+                             "(.csv or .json) on exit; F3 toggles the overlay either way")
+    parser.add_argument('--capture', metavar='FILE',
+                        help="Stream gameplay frames to FILE ('-' for stdout) as raw rgb24 video "
+                             "at the window's size")
+    parser.add_argument('--capture-scale', type=int, default=1, metavar='N',
+                        help="With --capture, downscale frames by N")
+    parser.add_argument('--capture-gray', action='store_true',
+                        help="With --capture, write 8-bit grayscale frames")
+    parser.add_argument('--render-scale', type=float, default=1.0, metavar='S',
+                        help="Render the playfield at S times 800x600 (0.5 for weak hardware)")
+    parser.add_argument('--window', type=parse_size, metavar='WxH',
+                        help="Window size; the playfield is resized to fit")
+    parser.add_argument('--fullscreen', action='store_true', help="Fill the screen")
+    parser.add_argument('--scaler', choices=SCALERS, default='smooth',
+                        help="How the playfield is resized to the window")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Print how long each startup step took on exit")
+    args = parser.parse_args()
+    if args.startup_report:
+        atexit.register(lambda: print(startup.report(), file=sys.stderr))
+
+    if args.replay:
+        started = time.perf_counter()
+        game = play_replay(args.replay, headless=args.headless or HEADLESS, speed=args.speed)
+        print(f"Score {game.score}, level {game.level} after "
+              f"{time.perf_counter() - started:.2f}s")
+        pygame.quit()
+        sys.exit()
+
+    capture = None
+    if args.capture:
+        capture = FrameStream(args.capture, args.capture_scale, args.capture_gray)
+        atexit.register(capture.close)
+    game = Game(replay_dir=args.record, profile=bool(args.profile), capture=capture,
+                render_scale=args.render_scale, window_size=args.window, scaler=args.scaler,
+                fullscreen=args.fullscreen)
+    if args.profile:
+        atexit.register(game.profiler.dump, args.profile)
     game.show_start_screen()
     if game.running:
         game.capture_initials()